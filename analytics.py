@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+
+def total_return_index(close: pd.DataFrame | pd.Series,
+                       dividends: pd.DataFrame | pd.Series) -> pd.DataFrame | pd.Series:
+    """배당 재투자 지수. 첫 종가에서 시작해 (종가 + 배당) / 전일 종가 를 누적곱한다."""
+    growth = close.add(dividends.fillna(0)).div(close.shift(1))
+    growth.iloc[0] = 1.0
+    return growth.cumprod().mul(close.iloc[0])
+
+
+def calendar_year_returns(prices: pd.DataFrame) -> pd.DataFrame:
+    """연도별 복리 수익률 (전 자산 한 번에 resample). 인덱스는 연도."""
+    growth = prices.pct_change().add(1)
+    annual = growth.resample('YE').prod(min_count=1).sub(1)
+    annual.index = annual.index.year
+    return annual
+
+
+METRIC_COLUMNS = ['CAGR', 'Volatility', 'Sharpe', 'Sortino', 'Calmar', 'MDD', 'Best Year', 'Worst Year',
+                  'Hit Rate', 'Years']
+YEAR_EDGE_TOLERANCE = pd.Timedelta(days=7)  # 연초/연말 휴장일을 감안해 이 안에서 시작·끝나면 온전한 해
+# 표 표시용 형식 (Styler.format)
+METRIC_FORMATS = {col: '{:.2%}' for col in ['CAGR', 'Volatility', 'MDD', 'Best Year', 'Worst Year', 'Hit Rate']} \
+    | {'Sharpe': '{:.2f}', 'Sortino': '{:.2f}', 'Calmar': '{:.2f}', 'Years': '{:.1f}'}
+
+
+def performance_metrics(values: pd.DataFrame, periods: int = 252, risk_free: float = 0.0) -> pd.DataFrame:
+    """가치(가격/지수) 행렬의 열마다 성과 지표를 한 번의 벡터 연산으로 계산한다. 행 = 열 이름, 열 = METRIC_COLUMNS.
+
+    CAGR/기간은 달력일(365.25일) 기준, 변동성/샤프/소르티노는 주기 수익률을 periods 로 연율화한다.
+    MDD 는 전체 기간 고점 대비, Calmar = CAGR / |MDD|. 열마다 시작일이 달라도 NaN 구간은 건너뛴다.
+    Best/Worst Year 는 열의 데이터가 연초부터 연말까지 있는 해만 본다 (앞뒤 부분 연도 제외, 없으면 NaN).
+    """
+    if isinstance(values, pd.Series):
+        values = values.to_frame()
+    data = values.to_numpy(dtype=float)
+    valid = ~np.isnan(data)
+    n_rows = len(data)
+    columns = np.arange(data.shape[1])
+    first = valid.argmax(axis=0)
+    last = n_rows - 1 - valid[::-1].argmax(axis=0)
+    has_data = valid.any(axis=0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = data[1:] / data[:-1] - 1
+        years = np.where(has_data, (values.index[last] - values.index[first]).days.to_numpy() / 365.25, np.nan)
+        cagr = (data[last, columns] / data[first, columns]) ** (1 / years) - 1
+
+        counts = np.sum(~np.isnan(returns), axis=0)
+        mean = np.nanmean(returns, axis=0) * periods
+        volatility = np.nanstd(returns, axis=0, ddof=1) * np.sqrt(periods)
+        downside = np.sqrt(np.nanmean(np.minimum(returns, 0) ** 2, axis=0) * periods)
+        hit_rate = np.sum(returns > 0, axis=0) / counts
+
+        # fmax 는 NaN 을 건너뛰므로 상장 전 구간이 있어도 누적 고점이 유지됨
+        peak = np.fmax.accumulate(data, axis=0)
+        mdd = np.nanmin(data / peak - 1, axis=0)
+
+        metrics = pd.DataFrame({
+            'CAGR': cagr,
+            'Volatility': volatility,
+            'Sharpe': (mean - risk_free) / volatility,
+            'Sortino': (mean - risk_free) / downside,
+            'Calmar': cagr / np.abs(mdd),
+            'MDD': mdd,
+            'Hit Rate': hit_rate,
+            'Years': years,
+        }, index=values.columns)
+
+    # 열별 데이터 기간이 해 전체를 덮는 경우만 (부분 연도의 짧은 수익률이 최고/최저로 잡히지 않게)
+    annual = calendar_year_returns(values)
+    year_start = pd.to_datetime(annual.index.astype(str) + '-01-01').to_numpy()
+    year_end = pd.to_datetime(annual.index.astype(str) + '-12-31').to_numpy()
+    first_date, last_date = values.index[first].to_numpy(), values.index[last].to_numpy()
+    tolerance = YEAR_EDGE_TOLERANCE.to_timedelta64()
+    complete = ((first_date[None, :] <= year_start[:, None] + tolerance)
+                & (last_date[None, :] >= year_end[:, None] - tolerance) & has_data[None, :])
+    annual = annual.where(complete)
+    metrics['Best Year'] = annual.max()
+    metrics['Worst Year'] = annual.min()
+    return metrics[METRIC_COLUMNS].replace([np.inf, -np.inf], np.nan)
+
+
+def fft_kde(samples: pd.DataFrame, grid_size: int = 512) -> tuple[np.ndarray, pd.DataFrame]:
+    """구간화 + FFT 합성곱으로 자산별 커널 밀도를 한 번에 추정한다.
+
+    대역폭은 자산별 Silverman 규칙을 쓰고, 가우시안 커널은 주파수 영역에서 곱한다.
+    """
+    values = samples.to_numpy(dtype=float)
+    counts = np.sum(~np.isnan(values), axis=0)
+    std = np.nanstd(values, axis=0, ddof=1)
+    bandwidth = np.where(counts > 1, 1.06 * np.nan_to_num(std) * np.maximum(counts, 1) ** -0.2, 0.0)
+    bandwidth = np.where(bandwidth > 0, bandwidth, 1.0)
+
+    # 커널 꼬리가 잘리지 않도록 양쪽에 3 대역폭만큼 여유를 둔다
+    lo = np.nanmin(values) - 3 * bandwidth.max()
+    hi = np.nanmax(values) + 3 * bandwidth.max()
+    grid = np.linspace(lo, hi, grid_size)
+    step = grid[1] - grid[0]
+
+    # 모든 자산을 한 번의 bincount 로 구간화
+    n_assets = values.shape[1]
+    bins = np.clip(np.rint((values - lo) / step), 0, grid_size - 1)
+    valid = ~np.isnan(values)
+    flat = (bins + np.arange(n_assets) * grid_size)[valid].astype(np.int64)
+    hist = np.bincount(flat, minlength=grid_size * n_assets).reshape(n_assets, grid_size).T
+
+    # 원형 합성곱 겹침을 막기 위해 2배로 zero-padding
+    n_fft = 2 * grid_size
+    freqs = np.fft.rfftfreq(n_fft, d=step)
+    kernel = np.exp(-0.5 * (2 * np.pi * freqs[:, None] * bandwidth[None, :]) ** 2)
+    density = np.fft.irfft(np.fft.rfft(hist, n=n_fft, axis=0) * kernel, n=n_fft, axis=0)[:grid_size]
+    density = np.clip(density, 0, None) / (np.maximum(counts, 1) * step)
+    return grid, pd.DataFrame(density, columns=samples.columns)
@@ -0,0 +1,355 @@
+"""분석 페이지와 같은 계산을 HTTP 로 제공하는 API 서버 (tornado).
+
+    python api_server.py serve --port 8600 --threads 8
+    python api_server.py bench "http://localhost:8600/api/correlation?tickers=AAPL,005930.KS" -c 16 -n 200
+
+가격/메타데이터는 화면과 같은 캐시 함수(st.cache_data, parquet 저장소, 디스크 캐시)를 거치므로
+같은 프로세스 안에서는 메모리 캐시를, 프로세스 사이에서는 디스크 저장소를 공유한다.
+계산은 스레드 풀에서 실행해 요청을 동시에 처리한다.
+
+응답은 표 하나이며 기본은 JSON(orient='split'), ?format=arrow 또는
+Accept: application/vnd.apache.arrow.stream 이면 Arrow IPC 스트림이다.
+
+GET  /api/health
+GET  /api/panel?tickers=AAPL,005930.KS&fields=TotalReturn&resolution=D&start=2020-01-01&end=
+GET  /api/correlation?tickers=...&kind=price|log_return
+POST /api/summary        {"positions": [...], "view": "tickers" | "sectors"}        (1비중)
+POST /api/performance    {"positions": [...], "resolution": "D", "start": ..., "end": ...}   (3포트폴리오 분석)
+POST /api/optimization   {"positions": [...], "cov_method": "Sample", "sims": 2000, "seed": 0, ...}  (4포트폴리오 평가)
+
+positions 항목은 홈 화면 포지션과 같은 키(stock_name, stock_num, stock_current, currency_unit)를 쓴다.
+"""
+import argparse
+import asyncio
+import io
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+import tornado.web
+from tornado.httpclient import AsyncHTTPClient, HTTPClientError
+from tornado.ioloop import IOLoop
+
+from analytics import performance_metrics
+from covariance import COV_ESTIMATORS, estimate_covariance
+from market_data import (PRICE_FIELDS, PRICE_TTL, RESOLUTIONS, currency_code, latest_fx_rates, periods_per_year,
+                         stock_df)
+from portfolio_analysis import N_SIMULATIONS, holding_weights, sharpe_frontier
+from positions import positions_frame, validate_positions
+from sectors import sector_exposure, sector_totals
+
+
+ARROW_MIME = 'application/vnd.apache.arrow.stream'
+MAX_SIMULATIONS = 20000
+
+
+def _tickers(value: str) -> tuple:
+    tickers = tuple(dict.fromkeys(ticker.strip().upper() for ticker in value.split(',') if ticker.strip()))
+    if not tickers:
+        raise ValueError("tickers 가 비어 있습니다.")
+    return tickers
+
+
+def _fields(value: str) -> tuple:
+    # 대소문자 구분 없이 PRICE_FIELDS 이름으로 맞춤 (기본: 배당 재투자 지수)
+    names = {field.lower(): field for field in PRICE_FIELDS}
+    fields = tuple(dict.fromkeys(field.strip() for field in value.split(',') if field.strip())) or ('TotalReturn',)
+    unknown = [field for field in fields if field.lower() not in names]
+    if unknown:
+        raise ValueError(f"지원하지 않는 필드: {', '.join(unknown)}")
+    return tuple(names[field.lower()] for field in fields)
+
+
+def _window(params: dict) -> tuple[str, str | None, str | None]:
+    resolution = params.get('resolution') or 'D'
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"resolution 은 {', '.join(RESOLUTIONS)} 중 하나여야 합니다.")
+    start, end = params.get('start') or None, params.get('end') or None
+    try:
+        dates = [pd.Timestamp(date) for date in (start, end) if date is not None]
+    except ValueError:
+        raise ValueError("start / end 는 YYYY-MM-DD 형식이어야 합니다.")
+    if len(dates) == 2 and dates[0] > dates[1]:
+        raise ValueError("start 가 end 보다 늦습니다.")
+    return resolution, start, end
+
+
+def _positions(records) -> pd.DataFrame:
+    """요청의 포지션을 검증하고 같은 티커는 수량을 합친다."""
+    raw = positions_frame(records or [])
+    if raw.empty:
+        raise ValueError("positions 가 비어 있습니다.")
+    raw['stock_price'] = raw['stock_price'].fillna(raw['stock_current'])  # 평단가는 계산에 쓰지 않음
+    valid, errors = validate_positions(raw.astype(object), check_tickers=False, row_offset=0)
+    if not errors.empty:
+        raise ValueError(" / ".join(f"{row[0]}번 {row[1]}: {row[2]}" for row in errors.itertuples(index=False)))
+    return (valid.groupby('stock_name', sort=False)
+            .agg(stock_num=('stock_num', 'sum'), stock_current=('stock_current', 'first'),
+                 currency_unit=('currency_unit', 'first'))
+            .reset_index())
+
+
+def _total_return(tickers: list, resolution: str, start, end, dtype: str = 'float64') -> pd.DataFrame:
+    """배당 재투자 지수 패널. 기간 안에 모든 티커의 공통 시세가 부족하면 ValueError (400 응답)."""
+    prices = stock_df(tickers, resolution=resolution, start=start, end=end, fields=('TotalReturn',),
+                      dtype=dtype)['TotalReturn']
+    missing = [ticker for ticker in tickers if ticker not in prices.columns]
+    if missing:
+        raise ValueError(f"시세가 없는 티커: {', '.join(missing)}")
+    if len(prices) < 2:
+        raise ValueError("분석 기간에 모든 티커의 시세가 있는 날이 2일 미만입니다. 기간을 넓혀주세요.")
+    return prices[tickers]
+
+
+def _fx(positions: pd.DataFrame) -> list:
+    currencies = [currency_code(unit) for unit in positions['currency_unit']]
+    rates = latest_fx_rates(tuple(currencies))
+    return [rates[currency] for currency in currencies]
+
+
+# 계산 결과도 화면처럼 st.cache_data 로 보관 (같은 입력의 동시 요청은 한 번만 계산)
+@st.cache_data(ttl=PRICE_TTL, show_spinner=False)
+def price_panel(tickers: tuple, fields: tuple, resolution: str, start, end) -> pd.DataFrame:
+    panel = stock_df(list(tickers), resolution=resolution, start=start, end=end, fields=fields)
+    if len(fields) == 1:
+        return panel[fields[0]]
+    panel.columns = [f"{field}:{ticker}" for field, ticker in panel.columns]
+    return panel
+
+
+@st.cache_data(ttl=PRICE_TTL, show_spinner=False)
+def correlation(tickers: tuple, kind: str, resolution: str, start, end) -> pd.DataFrame:
+    prices = _total_return(list(tickers), resolution, start, end, dtype='float32')
+    if kind == 'log_return':
+        prices = np.log(prices / prices.shift(1))
+    return prices.corr()
+
+
+@st.cache_data(ttl=PRICE_TTL, show_spinner=False)
+def holdings_summary(positions: pd.DataFrame, view: str) -> pd.DataFrame:
+    values = (positions['stock_num'] * positions['stock_current'] * _fx(positions)).to_list()
+    if view == 'sectors':
+        totals = sector_totals(sector_exposure(list(positions['stock_name']), values))
+        frame = totals.rename('Value').reset_index()
+    else:
+        frame = pd.DataFrame({'Ticker': positions['stock_name'], 'Value': values})
+    frame['Weight'] = frame['Value'] / frame['Value'].sum()
+    return frame
+
+
+@st.cache_data(ttl=PRICE_TTL, show_spinner=False)
+def performance(positions: pd.DataFrame, resolution: str, start, end) -> pd.DataFrame:
+    tickers = list(positions['stock_name'])
+    prices = _total_return(tickers, resolution, start, end)
+    weights = holding_weights(positions['stock_num'], positions['stock_current'], _fx(positions))
+    # 현재 비중으로 매 주기 재조정한 포트폴리오 수익률
+    prices['Portfolio'] = (prices.pct_change().fillna(0) @ weights).add(1).cumprod()
+
+    frame = performance_metrics(prices, periods_per_year(resolution))
+    frame['Weight'] = list(weights) + [1.0]
+    return frame.rename_axis('Ticker').reset_index()
+
+
+@st.cache_data(ttl=PRICE_TTL, show_spinner=False)
+def optimization(positions: pd.DataFrame, cov_method: str, sims: int, seed: int, resolution: str, start,
+                 end) -> pd.DataFrame:
+    tickers = list(positions['stock_name'])
+    prices = _total_return(tickers, resolution, start, end)
+    periods = periods_per_year(resolution)
+    daily_cov = estimate_covariance(prices.pct_change(), cov_method, periods)
+    port_df, max_sharpe, min_risk, _ = sharpe_frontier(prices, daily_cov, positions['stock_num'],
+                                                       positions['stock_current'], _fx(positions), periods, sims,
+                                                       np.random.default_rng(seed))
+    summary = pd.concat([port_df, max_sharpe.iloc[:1], min_risk.iloc[:1]], ignore_index=True)
+    summary.insert(0, 'Portfolio', ['Your Portfolio', 'Max Sharpe Ratio', 'Min Risk'])
+    return summary
+
+
+class ApiHandler(tornado.web.RequestHandler):
+    """parse() 가 (계산 함수, 인자) 를 돌려주면 스레드 풀에서 실행해 표 하나로 응답한다."""
+
+    def initialize(self, executor: ThreadPoolExecutor) -> None:
+        self.executor = executor
+
+    def parse(self) -> tuple:
+        raise NotImplementedError
+
+    def body_json(self) -> dict:
+        try:
+            return json.loads(self.request.body or b'{}')
+        except json.JSONDecodeError:
+            raise ValueError("요청 본문이 JSON 이 아닙니다.")
+
+    def params(self) -> dict:
+        return {key: self.get_query_argument(key) for key in self.request.query_arguments}
+
+    async def respond(self) -> None:
+        # 계산은 스레드 풀에서 (이벤트 루프는 다른 요청을 계속 받음)
+        try:
+            func, args = self.parse()
+            frame = await IOLoop.current().run_in_executor(self.executor, func, *args)
+        except (ValueError, KeyError) as e:
+            self.set_status(400)
+            self.finish({'error': str(e)})
+            return
+
+        if self.get_query_argument('format', '') == 'arrow' or ARROW_MIME in self.request.headers.get('Accept', ''):
+            import pyarrow as pa
+
+            table = pa.Table.from_pandas(frame, preserve_index=not isinstance(frame.index, pd.RangeIndex))
+            sink = io.BytesIO()
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            self.set_header('Content-Type', ARROW_MIME)
+            self.finish(sink.getvalue())
+        else:
+            self.set_header('Content-Type', 'application/json; charset=UTF-8')
+            self.finish(frame.to_json(orient='split', date_format='iso', force_ascii=False))
+
+    async def get(self) -> None:
+        await self.respond()
+
+    async def post(self) -> None:
+        await self.respond()
+
+    def write_error(self, status_code: int, **kwargs) -> None:
+        self.finish({'error': self._reason})
+
+
+class HealthHandler(tornado.web.RequestHandler):
+    def get(self) -> None:
+        self.finish({'status': 'ok'})
+
+
+class PanelHandler(ApiHandler):
+    SUPPORTED_METHODS = ('GET',)
+
+    def parse(self) -> tuple:
+        params = self.params()
+        return price_panel, (_tickers(params.get('tickers', '')), _fields(params.get('fields', '')), *_window(params))
+
+
+class CorrelationHandler(ApiHandler):
+    SUPPORTED_METHODS = ('GET',)
+
+    def parse(self) -> tuple:
+        params = self.params()
+        kind = params.get('kind') or 'price'
+        if kind not in ('price', 'log_return'):
+            raise ValueError("kind 는 price 또는 log_return 이어야 합니다.")
+        return correlation, (_tickers(params.get('tickers', '')), kind, *_window(params))
+
+
+class SummaryHandler(ApiHandler):
+    SUPPORTED_METHODS = ('POST',)
+
+    def parse(self) -> tuple:
+        body = self.body_json()
+        view = body.get('view') or 'tickers'
+        if view not in ('tickers', 'sectors'):
+            raise ValueError("view 는 tickers 또는 sectors 여야 합니다.")
+        return holdings_summary, (_positions(body.get('positions')), view)
+
+
+class PerformanceHandler(ApiHandler):
+    SUPPORTED_METHODS = ('POST',)
+
+    def parse(self) -> tuple:
+        body = self.body_json()
+        return performance, (_positions(body.get('positions')), *_window(body))
+
+
+class OptimizationHandler(ApiHandler):
+    SUPPORTED_METHODS = ('POST',)
+
+    def parse(self) -> tuple:
+        body = self.body_json()
+        cov_method = body.get('cov_method') or 'Sample'
+        if cov_method not in COV_ESTIMATORS:
+            raise ValueError(f"cov_method 는 {', '.join(COV_ESTIMATORS)} 중 하나여야 합니다.")
+        sims = int(body.get('sims') or N_SIMULATIONS)
+        if not 1 <= sims <= MAX_SIMULATIONS:
+            raise ValueError(f"sims 는 1 ~ {MAX_SIMULATIONS} 사이여야 합니다.")
+        return optimization, (_positions(body.get('positions')), cov_method, sims, int(body.get('seed') or 0),
+                              *_window(body))
+
+
+def make_app(threads: int = 8) -> tornado.web.Application:
+    executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='api')
+    handler_args = {'executor': executor}
+    return tornado.web.Application([
+        (r'/api/health', HealthHandler),
+        (r'/api/panel', PanelHandler, handler_args),
+        (r'/api/correlation', CorrelationHandler, handler_args),
+        (r'/api/summary', SummaryHandler, handler_args),
+        (r'/api/performance', PerformanceHandler, handler_args),
+        (r'/api/optimization', OptimizationHandler, handler_args),
+    ], compress_response=True)
+
+
+async def serve(port: int, threads: int) -> None:
+    make_app(threads).listen(port)
+    print(f"http://localhost:{port}/api/health")
+    await asyncio.Event().wait()
+
+
+async def bench(url: str, concurrency: int, requests: int, body: str | None) -> None:
+    """같은 요청을 동시에 보내 처리량과 지연 분포를 잰다 (첫 요청은 캐시 준비로 따로 표시)."""
+    client = AsyncHTTPClient(max_clients=concurrency)
+    method = 'POST' if body is not None else 'GET'
+    headers = {'Content-Type': 'application/json'}
+
+    async def one() -> float:
+        started = time.perf_counter()
+        try:
+            await client.fetch(url, method=method, body=body, headers=headers, request_timeout=300)
+        except HTTPClientError as e:
+            print(f"{e.code}: {e.response.body.decode() if e.response else e}")
+        return time.perf_counter() - started
+
+    first = await one()
+    queue = asyncio.Queue()
+    for _ in range(requests):
+        queue.put_nowait(None)
+    latencies = []
+
+    async def worker() -> None:
+        while not queue.empty():
+            queue.get_nowait()
+            latencies.append(await one())
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    print(f"first {first * 1000:.0f} ms · {requests} req / {concurrency} conc · {requests / elapsed:.1f} req/s · "
+          f"p50 {statistics.median(latencies) * 1000:.1f} ms · "
+          f"p95 {latencies[int(0.95 * (len(latencies) - 1))] * 1000:.1f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', help='API 서버 실행')
+    serve_parser.add_argument('--port', type=int, default=8600)
+    serve_parser.add_argument('--threads', type=int, default=8, help='계산 스레드 수')
+    bench_parser = commands.add_parser('bench', help='로컬 부하 테스트')
+    bench_parser.add_argument('url')
+    bench_parser.add_argument('-c', '--concurrency', type=int, default=16)
+    bench_parser.add_argument('-n', '--requests', type=int, default=200)
+    bench_parser.add_argument('--body', help='POST 로 보낼 JSON 파일')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        asyncio.run(serve(args.port, args.threads))
+    else:
+        body = open(args.body, encoding='utf-8').read() if args.body else None
+        asyncio.run(bench(args.url, args.concurrency, args.requests, body))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""여러 포트폴리오를 화면 없이 한 번에 분석해 parquet 로 저장한다.
+
+    python batch_analyzer.py portfolios.csv -o results/ --workers 8
+
+입력(CSV / Parquet)은 포트폴리오 열(portfolio)과 홈 화면의 포지션 열(티커, 수량, 현재가, 평단가, 화폐단위)을
+가진 long 포맷이다. 가격 패널은 전체 종목에 대해 한 번만 만들어 모든 작업 프로세스가 메모리 맵으로 공유한다.
+
+출력:
+    summary.parquet       포트폴리오별 현재/최대 샤프/최소 리스크 수익률·리스크·샤프, 현재 비중 보유 성과(CAGR, MDD 등)
+    weights.parquet       포트폴리오 × 구분(Your Portfolio / Max Sharpe Ratio / Min Risk) × 종목 비중
+    correlations.parquet  포트폴리오 내 종목 쌍별 수익률 상관계수
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from analytics import performance_metrics
+from covariance import COV_ESTIMATORS, estimate_covariance
+from market_data import RESOLUTIONS, currency_code, latest_fx_rates, periods_per_year, stock_df
+from portfolio_analysis import N_SIMULATIONS, buy_and_hold, sharpe_frontier
+from positions import COLUMN_ALIASES, POSITION_COLUMNS, validate_positions
+
+
+PORTFOLIO_ALIASES = ('portfolio', 'portfolio_id', '포트폴리오', 'account', '계좌')
+MIN_PERIODS = 3  # 공통 기간이 이보다 짧으면 분석하지 않음
+PORTFOLIO_LABELS = ('Your Portfolio', 'Max Sharpe Ratio', 'Min Risk')
+
+# 작업 프로세스 전역: 초기화 때 한 번 연결한 공유 패널
+_panel = None
+
+
+def read_portfolios(path: str) -> pd.DataFrame:
+    """portfolio + 포지션 열로 정규화한다. 같은 포트폴리오의 중복 티커는 수량을 합친다."""
+    raw = pd.read_parquet(path) if path.lower().endswith('.parquet') else pd.read_csv(path, dtype=str,
+                                                                                      encoding='utf-8-sig')
+    raw.columns = [str(col).strip() for col in raw.columns]
+    portfolio_col = next((col for col in raw.columns if col.lower() in PORTFOLIO_ALIASES), None)
+    if portfolio_col is None:
+        raise ValueError(f"포트폴리오 열이 없습니다. 다음 중 하나가 필요합니다: {', '.join(PORTFOLIO_ALIASES)}")
+
+    renamed = raw.rename(columns=lambda col: COLUMN_ALIASES.get(col, COLUMN_ALIASES.get(col.lower(), col)))
+    if 'stock_price' not in renamed.columns and 'stock_current' in renamed.columns:
+        renamed['stock_price'] = renamed['stock_current']  # 평단가는 분석에 쓰지 않음
+    for col in POSITION_COLUMNS:
+        if col not in renamed.columns:
+            renamed[col] = np.nan
+    # 티커 조회 없이 형식만 검증 (시세가 없는 종목은 패널 단계에서 걸러짐)
+    valid, errors = validate_positions(renamed[POSITION_COLUMNS].astype(object), check_tickers=False)
+    for row in errors.itertuples(index=False):
+        print(f"{row[0]}행 {row[1]}: {row[2]}", file=sys.stderr)
+
+    valid['portfolio'] = raw.loc[valid.index, portfolio_col].astype(str)
+    return (valid.groupby(['portfolio', 'stock_name'], sort=False)
+            .agg(stock_num=('stock_num', 'sum'), stock_current=('stock_current', 'first'),
+                 currency_unit=('currency_unit', 'first'))
+            .reset_index())
+
+
+def _attach_panel(path: str, index: np.ndarray, tickers: list) -> None:
+    global _panel
+    # 복사하지 않고 메모리 맵으로 열어 모든 프로세스가 같은 페이지를 공유
+    _panel = (np.load(path, mmap_mode='r'), pd.DatetimeIndex(index), {ticker: j for j, ticker in enumerate(tickers)})
+
+
+def analyze_portfolio(task: dict) -> dict:
+    """포트폴리오 하나의 요약/비중/상관계수 행. 페이지와 같은 계산 함수를 쓴다."""
+    values, index, columns = _panel
+    tickers = [ticker for ticker in task['tickers'] if ticker in columns]
+    missing = sorted(set(task['tickers']) - set(tickers))
+    summary = {'portfolio': task['portfolio'], 'n_assets': len(task['tickers']), 'error': ''}
+    if missing:
+        summary['error'] = f"시세 없음: {', '.join(missing)}"
+        return {'summary': summary, 'weights': [], 'correlations': []}
+
+    # 종목 공통 기간만 사용 (페이지의 결측 행 제거와 동일)
+    prices = pd.DataFrame(values[:, [columns[ticker] for ticker in tickers]], index=index, columns=tickers).dropna()
+    if len(prices) < MIN_PERIODS:
+        summary['error'] = "공통 시세 기간이 너무 짧습니다."
+        return {'summary': summary, 'weights': [], 'correlations': []}
+
+    periods = task['periods']
+    daily_cov = estimate_covariance(prices.pct_change(), task['cov_method'], periods)
+    port_df, max_sharpe, min_risk, _ = sharpe_frontier(prices, daily_cov, task['qtys'], task['prices'],
+                                                       task['fx_rates'], periods, task['n_sims'],
+                                                       np.random.default_rng([task['seed'], task['number']]))
+
+    weight_rows = []
+    for label, frame in zip(PORTFOLIO_LABELS, (port_df, max_sharpe, min_risk)):
+        row = frame.iloc[0]
+        summary.update({f'{label} {col}': float(row[col]) for col in ('Returns', 'Risk', 'Sharpe')})
+        weight_rows += [{'portfolio': task['portfolio'], 'kind': label, 'ticker': ticker, 'weight': float(row[ticker])}
+                        for ticker in tickers]
+
+    # 현재 비중 매수 후 보유 가치의 성과 지표 (페이지와 같은 계산)
+    holdings = buy_and_hold(prices, port_df.iloc[0][tickers], task['money'])
+    metrics = performance_metrics(holdings[['TotalValue']], periods).iloc[0]
+    summary.update({col: float(metrics[col]) for col in ('CAGR', 'Volatility', 'Sortino', 'Calmar', 'MDD', 'Years')})
+    summary.update({
+        'start': prices.index[0],
+        'end': prices.index[-1],
+        'Final Value': float(holdings['TotalValue'].iloc[-1]),
+    })
+
+    corr = prices.pct_change().corr().to_numpy()
+    upper_a, upper_b = np.triu_indices(len(tickers), k=1)
+    correlations = [{'portfolio': task['portfolio'], 'ticker_a': tickers[a], 'ticker_b': tickers[b],
+                     'correlation': float(corr[a, b])} for a, b in zip(upper_a, upper_b)]
+    return {'summary': summary, 'weights': weight_rows, 'correlations': correlations}
+
+
+def run_batch(portfolios: pd.DataFrame, output_dir: str, workers: int | None = None, resolution: str = 'D',
+              start: str | None = None, end: str | None = None, cov_method: str = 'Sample',
+              n_sims: int = N_SIMULATIONS, money: float = 10000000, seed: int = 0) -> pd.DataFrame:
+    tickers = list(dict.fromkeys(portfolios['stock_name']))
+    currencies = list(dict.fromkeys(portfolios['currency_unit'].map(currency_code)))
+    fx_rates = latest_fx_rates(tuple(currencies))
+
+    # 전체 종목의 배당 재투자 지수 패널 한 번 (상장 기간이 달라도 행을 버리지 않음)
+    panel = stock_df(tickers, resolution=resolution, start=start, end=end, fields=('TotalReturn',),
+                     complete_rows=False)['TotalReturn']
+    periods = periods_per_year(resolution)
+
+    tasks = []
+    for number, (name, group) in enumerate(portfolios.groupby('portfolio', sort=False)):
+        tasks.append({
+            'portfolio': name, 'number': number, 'tickers': list(group['stock_name']),
+            'qtys': list(group['stock_num']), 'prices': list(group['stock_current']),
+            'fx_rates': [fx_rates[currency_code(unit)] for unit in group['currency_unit']],
+            'periods': periods, 'cov_method': cov_method, 'n_sims': n_sims, 'money': money, 'seed': seed,
+        })
+
+    workers = workers or os.cpu_count() or 1
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        panel_path = os.path.join(tmp_dir, 'panel.npy')
+        np.save(panel_path, np.ascontiguousarray(panel.to_numpy(dtype=float)))
+        initargs = (panel_path, panel.index.to_numpy(), list(panel.columns))
+        # 작은 작업을 묶어서 보내 프로세스 간 통신 횟수를 줄임
+        chunksize = max(1, len(tasks) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_attach_panel, initargs=initargs) as pool:
+            results = list(pool.map(analyze_portfolio, tasks, chunksize=chunksize))
+
+    os.makedirs(output_dir, exist_ok=True)
+    summary = pd.DataFrame([result['summary'] for result in results])
+    summary.to_parquet(os.path.join(output_dir, 'summary.parquet'), index=False)
+    pd.DataFrame([row for result in results for row in result['weights']],
+                 columns=['portfolio', 'kind', 'ticker', 'weight']).to_parquet(
+        os.path.join(output_dir, 'weights.parquet'), index=False)
+    pd.DataFrame([row for result in results for row in result['correlations']],
+                 columns=['portfolio', 'ticker_a', 'ticker_b', 'correlation']).to_parquet(
+        os.path.join(output_dir, 'correlations.parquet'), index=False)
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help='포트폴리오 CSV 또는 Parquet')
+    parser.add_argument('-o', '--output', default='batch_results', help='결과 폴더')
+    parser.add_argument('--workers', type=int, default=None, help='프로세스 수 (기본: CPU 수)')
+    parser.add_argument('--resolution', choices=list(RESOLUTIONS), default='D')
+    parser.add_argument('--start', help='YYYY-MM-DD')
+    parser.add_argument('--end', help='YYYY-MM-DD')
+    parser.add_argument('--cov-method', choices=list(COV_ESTIMATORS), default='Sample')
+    parser.add_argument('--sims', type=int, default=N_SIMULATIONS, help='몬테카를로 비중 수')
+    parser.add_argument('--money', type=float, default=10000000, help='매수 후 보유 시뮬레이션 원금')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    portfolios = read_portfolios(args.input)
+    summary = run_batch(portfolios, args.output, args.workers, args.resolution, args.start, args.end,
+                        args.cov_method, args.sims, args.money, args.seed)
+    failed = int((summary['error'] != '').sum())
+    print(f"{len(summary)}개 포트폴리오 ({failed}개 실패) · {time.perf_counter() - started:.1f}초 · {args.output}")
+
+
+if __name__ == '__main__':
+    main()
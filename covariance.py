@@ -0,0 +1,98 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from disk_cache import _MISSING, cache_get, cache_set
+
+
+EWMA_LAMBDA = 0.94  # RiskMetrics 일간 감쇠 계수
+EWMA_TTL = 30 * 24 * 3600
+
+
+def sample_cov(returns: pd.DataFrame) -> pd.DataFrame:
+    return returns.dropna().cov()
+
+
+def ledoit_wolf_cov(returns: pd.DataFrame) -> pd.DataFrame:
+    """Ledoit-Wolf 축소 추정: 표본 공분산을 평균 분산 * I 쪽으로 최적 비율만큼 당긴다."""
+    values = returns.dropna().to_numpy(dtype=float)
+    n_obs, n_assets = values.shape
+    centered = values - values.mean(axis=0)
+    sample = centered.T @ centered / n_obs
+    target = np.trace(sample) / n_assets
+
+    # 목표와의 거리 d², 표본 공분산 추정 오차 b² (b² <= d² 로 자름)
+    d2 = np.sum((sample - target * np.eye(n_assets)) ** 2)
+    squared = centered ** 2
+    b2 = min(np.sum(squared.T @ squared / n_obs - sample ** 2) / n_obs, d2)
+    shrinkage = b2 / d2 if d2 > 0 else 1.0
+
+    cov = shrinkage * target * np.eye(n_assets) + (1 - shrinkage) * sample
+    # 다른 추정기와 같은 (n - 1) 분모 기준으로 맞춤
+    return pd.DataFrame(cov * n_obs / max(n_obs - 1, 1), index=returns.columns, columns=returns.columns)
+
+
+@dataclass
+class EwmaState:
+    """EWMA 누적 상태. cov = cross / weight_sum (평균 0 가정, RiskMetrics)."""
+    columns: tuple
+    decay: float
+    first_date: pd.Timestamp
+    last_date: pd.Timestamp
+    weight_sum: float
+    cross: np.ndarray
+
+    def update(self, new_returns: pd.DataFrame) -> 'EwmaState':
+        # 새 봉만 반영: S_t = λ S_{t-1} + r_t r_t',  W_t = λ W_{t-1} + 1
+        values = new_returns[list(self.columns)].to_numpy(dtype=float)
+        if len(values) == 0:
+            return self
+        decay_weights = self.decay ** np.arange(len(values) - 1, -1, -1)
+        scale = self.decay ** len(values)
+        self.cross = scale * self.cross + (values * decay_weights[:, None]).T @ values
+        self.weight_sum = scale * self.weight_sum + decay_weights.sum()
+        self.last_date = new_returns.index[-1]
+        return self
+
+    def covariance(self) -> pd.DataFrame:
+        return pd.DataFrame(self.cross / self.weight_sum, index=list(self.columns), columns=list(self.columns))
+
+
+def ewma_state(returns: pd.DataFrame, decay: float = EWMA_LAMBDA) -> EwmaState:
+    returns = returns.dropna()
+    state = EwmaState(tuple(returns.columns), decay, returns.index[0], returns.index[0], 0.0,
+                      np.zeros((returns.shape[1], returns.shape[1])))
+    return state.update(returns)
+
+
+def ewma_cov(returns: pd.DataFrame, decay: float = EWMA_LAMBDA) -> pd.DataFrame:
+    """지수가중 공분산. 저장된 상태가 있으면 이후 추가된 봉만 갱신한다."""
+    returns = returns.dropna()
+    key = repr((tuple(returns.columns), decay))
+    state = cache_get('ewma_cov', key, EWMA_TTL)
+
+    if state is _MISSING or state.first_date != returns.index[0] or state.last_date not in returns.index:
+        state = ewma_state(returns, decay)
+    elif state.last_date == returns.index[-1]:
+        return state.covariance()
+    else:
+        state.update(returns.loc[returns.index > state.last_date])
+
+    cache_set('ewma_cov', key, state)
+    return state.covariance()
+
+
+# 이름 -> 일간 수익률 패널을 받아 일간 공분산을 돌려주는 함수
+COV_ESTIMATORS = {
+    'Sample': sample_cov,
+    'Ledoit-Wolf': ledoit_wolf_cov,
+    'EWMA': ewma_cov,
+}
+
+
+def estimate_covariance(returns: pd.DataFrame, method: str = 'Sample', periods_per_year: int = 252) -> pd.DataFrame:
+    if method == 'EWMA':
+        # 일간 λ 와 같은 반감기가 되도록 주기에 맞춰 감쇠 계수 조정
+        return ewma_cov(returns, EWMA_LAMBDA ** (252 / periods_per_year))
+    return COV_ESTIMATORS[method](returns)
@@ -0,0 +1,79 @@
+import functools
+import hashlib
+import os
+import pickle
+import tempfile
+import time
+
+
+CACHE_DIR = os.environ.get(
+    'PORTFOLIO_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'cache')
+)
+
+_MISSING = object()
+
+
+def _cache_path(namespace: str, key: str) -> str:
+    digest = hashlib.sha1(key.encode()).hexdigest()
+    return os.path.join(CACHE_DIR, namespace, f"{digest}.pkl")
+
+
+def cache_get(namespace: str, key: str, ttl: float):
+    path = _cache_path(namespace, key)
+    try:
+        if time.time() - os.path.getmtime(path) > ttl:
+            return _MISSING
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return _MISSING
+
+
+def cache_set(namespace: str, key: str, value) -> None:
+    path = _cache_path(namespace, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # 동시에 읽는 세션이 깨진 파일을 보지 않도록 임시 파일에 쓴 뒤 교체
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def cache_clear(namespace: str, key: str | None = None) -> None:
+    if key is not None:
+        paths = [_cache_path(namespace, key)]
+    else:
+        directory = os.path.join(CACHE_DIR, namespace)
+        paths = [os.path.join(directory, name) for name in os.listdir(directory)] if os.path.isdir(directory) else []
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def disk_cached(namespace: str, ttl: float):
+    """인자별로 결과를 디스크에 ttl 초 동안 보관한다. None 결과는 저장하지 않는다.
+
+    func.cache_clear(*args) 는 그 인자의 항목만, 인자 없이 부르면 namespace 전체를 지운다.
+    """
+    def decorator(func):
+        def make_key(args, kwargs):
+            return repr((args, sorted(kwargs.items())))
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            value = cache_get(namespace, key, ttl)
+            if value is _MISSING:
+                value = func(*args, **kwargs)
+                if value is not None:
+                    cache_set(namespace, key, value)
+            return value
+
+        def clear(*args, **kwargs):
+            cache_clear(namespace, make_key(args, kwargs) if args or kwargs else None)
+
+        wrapper.cache_clear = clear
+        return wrapper
+    return decorator
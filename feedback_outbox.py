@@ -0,0 +1,127 @@
+import datetime
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from portfolio_db import due_feedback, init_db, mark_feedback_failed, mark_feedback_sent
+
+
+NOTION_URL = 'https://api.notion.com/v1/pages/'
+NOTION_VERSION = '2022-06-28'
+
+BATCH_SIZE = 20
+POLL_INTERVAL = 30  # 초, 깨우지 않아도 이 간격으로 재시도 대상 확인
+REQUEST_TIMEOUT = (3.05, 10)  # 연결, 읽기 (초)
+MAX_ATTEMPTS = 8
+RETRY_BASE = 30  # 초, 실패할 때마다 두 배 (최대 RETRY_MAX)
+RETRY_MAX = 3600
+# 다시 보내도 결과가 같은 응답은 재시도하지 않음
+PERMANENT_STATUSES = (400, 401, 403, 404)
+
+logger = logging.getLogger(__name__)
+
+_worker = None
+_wake = threading.Event()
+_lock = threading.Lock()
+
+
+def notion_page(database_id: str, date: str, rating: int, text: str) -> dict:
+    """피드백 한 건을 Notion 데이터베이스 페이지 생성 요청 본문으로 만든다."""
+    return {
+        'parent': {
+            'type': 'database_id',
+            'database_id': database_id,
+        },
+        'properties': {
+            '이름': {'title': [{'text': {'content': 'STREAMLIT_Portfolio'}}]},
+            '날짜': {'date': {'start': date}},
+            '별점': {'number': rating},
+            '텍스트': {'rich_text': [{'text': {'content': text}}]},
+        },
+        'children': [
+            {
+                'object': 'block',
+                'type': 'paragraph',
+                'paragraph': {
+                    'rich_text': [{'type': 'text', 'text': {'content': '여기에 추가적인 정보를 입력할 수 있습니다.'}}]
+                },
+            }
+        ],
+    }
+
+
+def make_session(api_key: str) -> requests.Session:
+    # 연결을 재사용하고, 요청이 나가기 전의 연결 실패만 어댑터에서 짧게 재시도
+    # 페이지 생성은 멱등이 아니라 응답 오류(429/5xx)는 outbox 가 간격을 늘려 가며 다시 보낸다
+    session = requests.Session()
+    session.headers.update({
+        'Authorization': f'Bearer {api_key}',
+        'Content-Type': 'application/json',
+        'Notion-Version': NOTION_VERSION,
+    })
+    retry = Retry(total=2, connect=2, read=False, status=False, other=False, backoff_factor=0.5)
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=2, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def _retry_at(attempts: int) -> datetime.datetime | None:
+    if attempts + 1 >= MAX_ATTEMPTS:
+        return None
+    delay = min(RETRY_BASE * 2 ** attempts, RETRY_MAX)
+    return datetime.datetime.now() + datetime.timedelta(seconds=delay)
+
+
+def flush_outbox(session: requests.Session, url: str, batch_size: int = BATCH_SIZE) -> int:
+    """전송 시각이 된 항목을 한 묶음 보내고 성공한 개수를 돌려준다."""
+    sent = 0
+    for item in due_feedback(batch_size):
+        try:
+            response = session.post(url, json=item['payload'], timeout=REQUEST_TIMEOUT)
+        except requests.RequestException as e:
+            # 서버에 닿지 않으면 나머지도 실패하므로 이번 묶음은 여기서 중단
+            mark_feedback_failed(item['id'], str(e), _retry_at(item['attempts']))
+            break
+
+        if response.ok:
+            mark_feedback_sent(item['id'])
+            sent += 1
+        elif response.status_code in PERMANENT_STATUSES:
+            mark_feedback_failed(item['id'], f"{response.status_code}: {response.text}", None)
+        else:
+            mark_feedback_failed(item['id'], f"{response.status_code}: {response.text}", _retry_at(item['attempts']))
+    return sent
+
+
+def _run(session: requests.Session, url: str, poll_interval: float) -> None:
+    while True:
+        _wake.wait(poll_interval)
+        _wake.clear()
+        try:
+            # 묶음이 가득 찼으면 남은 항목이 있으므로 바로 다음 묶음
+            while flush_outbox(session, url) == BATCH_SIZE:
+                pass
+        except Exception:
+            logger.exception("피드백 전송 중 오류")
+
+
+def start_worker(url: str, api_key: str, poll_interval: float = POLL_INTERVAL) -> threading.Thread:
+    """프로세스당 하나의 백그라운드 전송 스레드를 띄운다 (이미 있으면 그대로 사용)."""
+    global _worker
+    with _lock:
+        if _worker is None or not _worker.is_alive():
+            init_db()
+            _worker = threading.Thread(target=_run, args=(make_session(api_key), url, poll_interval),
+                                       name='feedback-outbox', daemon=True)
+            _worker.start()
+            # 이전 프로세스에서 남은 항목부터 바로 전송
+            _wake.set()
+    return _worker
+
+
+def notify_worker() -> None:
+    _wake.set()
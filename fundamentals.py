@@ -0,0 +1,42 @@
+import pandas as pd
+
+from disk_cache import disk_cached
+
+
+# 데이터셋별 보관 기간: 재무제표는 분기, 애널리스트 추천은 하루
+STATEMENT_TTL = 90 * 24 * 3600
+RECOMMENDATION_TTL = 24 * 3600
+
+
+def _frame(ticker_symbol: str, attribute: str) -> pd.DataFrame | None:
+    import yfinance as yf
+
+    try:
+        frame = getattr(yf.Ticker(ticker_symbol), attribute)
+    except Exception:
+        return None
+    # 빈 응답은 저장하지 않음 (일시적인 실패를 분기 내내 들고 있지 않도록)
+    if frame is None or frame.empty:
+        return None
+    return frame
+
+
+@disk_cached('financials', STATEMENT_TTL)
+def get_financials(ticker_symbol: str) -> pd.DataFrame | None:
+    return _frame(ticker_symbol, 'financials')
+
+
+@disk_cached('balance_sheet', STATEMENT_TTL)
+def get_balance_sheet(ticker_symbol: str) -> pd.DataFrame | None:
+    return _frame(ticker_symbol, 'balance_sheet')
+
+
+@disk_cached('recommendations', RECOMMENDATION_TTL)
+def get_recommendations(ticker_symbol: str) -> pd.DataFrame | None:
+    return _frame(ticker_symbol, 'recommendations')
+
+
+def refresh_fundamentals(ticker_symbol: str) -> None:
+    """한 종목의 재무제표/추천 캐시를 지워 다음 조회 때 새로 받게 한다."""
+    for fetch in (get_financials, get_balance_sheet, get_recommendations):
+        fetch.cache_clear(ticker_symbol)
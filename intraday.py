@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+
+
+# 봉 간격 -> (기본 새로고침 초, 버퍼 크기). 정규장 6.5시간 = 1분봉 390개 + 여유
+INTRADAY_INTERVALS = {'1m': (60, 480), '5m': (300, 96)}
+BAR_FIELDS = ('Open', 'High', 'Low', 'Close', 'Volume')
+
+
+class RingBuffer:
+    """고정 크기 봉 버퍼. 가득 차면 가장 오래된 봉부터 덮어써 메모리가 늘지 않는다."""
+
+    def __init__(self, capacity: int, n_fields: int = len(BAR_FIELDS)):
+        self.times = np.zeros(capacity, dtype='int64')  # UTC ns
+        self.values = np.full((capacity, n_fields), np.nan)
+        self.capacity = capacity
+        self.size = 0
+        self.head = 0  # 다음에 쓸 위치
+
+    @property
+    def last_time(self) -> int | None:
+        return int(self.times[(self.head - 1) % self.capacity]) if self.size else None
+
+    def extend(self, times: np.ndarray, values: np.ndarray) -> int:
+        """마지막 봉 이후만 추가하고, 마지막 봉과 같은 시각이면 (아직 만들어지는 봉) 덮어쓴다."""
+        last = self.last_time
+        if last is not None:
+            same = times == last
+            if same.any():
+                self.values[(self.head - 1) % self.capacity] = values[same][-1]
+            newer = times > last
+            times, values = times[newer], values[newer]
+        if len(times) > self.capacity:
+            times, values = times[-self.capacity:], values[-self.capacity:]
+
+        slots = (self.head + np.arange(len(times))) % self.capacity
+        self.times[slots] = times
+        self.values[slots] = values
+        self.head = (self.head + len(times)) % self.capacity
+        self.size = min(self.size + len(times), self.capacity)
+        return len(times)
+
+    def frame(self, columns=BAR_FIELDS) -> pd.DataFrame:
+        order = (self.head - self.size + np.arange(self.size)) % self.capacity
+        index = pd.DatetimeIndex(self.times[order]).tz_localize('UTC')
+        return pd.DataFrame(self.values[order], index=index, columns=list(columns))
+
+
+class IntradayFeed:
+    """보유 종목 분봉을 한 번의 일괄 요청으로 폴링한다. 매번 마지막 봉 이후만 받는다."""
+
+    def __init__(self, tickers: list, interval: str = '5m'):
+        self.tickers = list(dict.fromkeys(tickers))
+        self.interval = interval
+        capacity = INTRADAY_INTERVALS[interval][1]
+        self.buffers = {ticker: RingBuffer(capacity) for ticker in self.tickers}
+        self.polls = 0
+        self.last_poll = None
+
+    def requests(self) -> list[tuple[list, dict]]:
+        """(티커 목록, 요청 범위) 묶음. 버퍼가 빈 종목만 최근 거래일 전체, 나머지는 시장별 커서 이후만.
+
+        거래 시간이 다른 시장(예: 한국 / 미국)을 한 커서로 묶으면 먼저 끝난 시장의 마지막 봉부터
+        모든 종목을 다시 받게 되므로 시장(티커 접미사)마다 가장 늦은 종목의 마지막 봉부터 요청한다.
+        """
+        groups = {}
+        for ticker, buffer in self.buffers.items():
+            last = buffer.last_time
+            # 접미사 없는 티커는 미국 상장, 빈 버퍼는 시장과 무관하게 한 묶음(None)
+            market = None if last is None else ticker.rpartition('.')[2].upper() if '.' in ticker else 'US'
+            tickers, since = groups.get(market, ([], last))
+            groups[market] = (tickers + [ticker], None if last is None else min(since, last))
+        # 커서 봉은 아직 만들어지는 중일 수 있어 포함
+        return [(tickers, {'period': '1d'} if market is None
+                 else {'start': pd.Timestamp(since, tz='UTC').to_pydatetime()})
+                for market, (tickers, since) in groups.items()]
+
+    def poll(self) -> int:
+        """새 봉 개수를 돌려준다. 첫 호출은 최근 거래일 전체, 이후는 증분만 요청."""
+        import yfinance as yf
+
+        added = 0
+        for tickers, request in self.requests():
+            bars = yf.download(tickers, interval=self.interval, group_by='ticker', auto_adjust=False,
+                               prepost=False, progress=False, threads=False, **request)
+            added += self._ingest(tickers, bars)
+        self.polls += 1
+        self.last_poll = pd.Timestamp.now(tz='UTC')
+        return added
+
+    def _ingest(self, tickers: list, bars: pd.DataFrame) -> int:
+        if bars is None or bars.empty:
+            return 0
+        if not isinstance(bars.columns, pd.MultiIndex):
+            bars = pd.concat({tickers[0]: bars}, axis=1)
+
+        index = bars.index.tz_localize('UTC') if bars.index.tz is None else bars.index.tz_convert('UTC')
+        times = index.asi8
+        added = 0
+        for ticker in tickers:
+            buffer = self.buffers[ticker]
+            if ticker not in bars.columns.get_level_values(0):
+                continue
+            values = bars[ticker].reindex(columns=list(BAR_FIELDS)).to_numpy(dtype=float)
+            valid = ~np.isnan(values[:, BAR_FIELDS.index('Close')])
+            added += buffer.extend(times[valid], values[valid])
+        return added
+
+    def frame(self, ticker: str) -> pd.DataFrame:
+        return self.buffers[ticker].frame()
+
+    def closes(self) -> pd.DataFrame:
+        return pd.DataFrame({ticker: buffer.frame()['Close'] for ticker, buffer in self.buffers.items()})
+
+
+def intraday_pnl(stock_list: list[dict], feed: IntradayFeed, fx_rates: dict, scales: dict) -> pd.DataFrame:
+    """저장된 수량/평단가와 최신 분봉 가격으로 평가손익과 당일 손익(시가 대비)을 구한다.
+
+    fx_rates: 통화 코드 -> 기준 통화 환산율, scales: 티커 -> (통화 코드, 가격 배율)
+    """
+    rows = []
+    for stock in stock_list:
+        ticker = stock['stock_name']
+        bars = feed.frame(ticker) if ticker in feed.buffers else pd.DataFrame()
+        currency, scale = scales[ticker]
+        qty, avg_price = float(stock['stock_num']), float(stock['stock_price'])
+        if bars.empty:
+            rows.append({'Ticker': ticker, 'Last': np.nan, 'Avg Price': avg_price, 'Qty': qty})
+            continue
+
+        # 당일 시가: 버퍼의 마지막 거래일 첫 봉
+        session = bars[bars.index.normalize() == bars.index[-1].normalize()]
+        last, session_open = bars['Close'].iloc[-1] * scale, session['Open'].iloc[0] * scale
+        rate = fx_rates[currency]
+        rows.append({
+            'Ticker': ticker,
+            'Last': last,
+            'Avg Price': avg_price,
+            'Qty': qty,
+            'Day %': last / session_open - 1,
+            'Day P&L': (last - session_open) * qty * rate,
+            'Unrealized P&L': (last - avg_price) * qty * rate,
+            'Return %': last / avg_price - 1 if avg_price else np.nan,
+            'Bar Time': bars.index[-1],
+        })
+    return pd.DataFrame(rows)
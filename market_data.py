@@ -0,0 +1,349 @@
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from analytics import total_return_index
+from disk_cache import CACHE_DIR
+
+
+KOREAN_SUFFIXES = ('.KS', '.KQ')
+SUPPORTED_QUOTE_TYPES = ('EQUITY', 'ETF')
+PRICE_TTL = 12 * 3600
+QUOTE_TTL = 60  # 현재가는 1분 동안 모든 세션이 공유
+
+BASE_CURRENCY = 'KRW'
+# 화면 표기(화폐단위) <-> ISO 통화 코드
+CURRENCY_UNITS = {
+    'USD($)': 'USD',
+    '원(₩)': 'KRW',
+    '엔(¥)': 'JPY',
+    '홍콩달러(HK$)': 'HKD',
+    '유로(€)': 'EUR',
+    '파운드(£)': 'GBP',
+    '위안(CN¥)': 'CNY',
+}
+UNIT_BY_CURRENCY = {code: unit for unit, code in CURRENCY_UNITS.items()}
+# 보조 단위로 호가되는 시장 (예: 런던 GBp = 0.01 GBP)
+MINOR_CURRENCIES = {'GBp': ('GBP', 0.01), 'GBX': ('GBP', 0.01), 'ZAc': ('ZAR', 0.01), 'ILA': ('ILS', 0.01)}
+# 보조 단위로 호가될 수 있는 시장 (현재가 배율 확인에 메타데이터가 필요한 종목)
+MINOR_UNIT_SUFFIXES = ('.L', '.IL', '.JO', '.TA')
+SUFFIX_CURRENCIES = {
+    '.KS': 'KRW', '.KQ': 'KRW', '.T': 'JPY', '.HK': 'HKD', '.SS': 'CNY', '.SZ': 'CNY', '.L': 'GBP',
+    '.DE': 'EUR', '.F': 'EUR', '.PA': 'EUR', '.AS': 'EUR', '.MI': 'EUR', '.MC': 'EUR', '.BR': 'EUR',
+}
+
+
+def is_korean_ticker(ticker_symbol: str) -> bool:
+    return ticker_symbol.endswith(KOREAN_SUFFIXES)
+
+
+def currency_code(unit: str) -> str:
+    return CURRENCY_UNITS.get(unit, unit)
+
+
+def listing_currency(ticker_symbol: str, info: dict | None = None) -> tuple[str, float]:
+    """상장 통화와 가격 배율을 돌려준다. 메타데이터가 없으면 티커 접미사로 추정."""
+    currency = (info or {}).get('currency')
+    if currency:
+        return MINOR_CURRENCIES.get(currency, (currency.upper(), 1.0))
+    for suffix, code in SUFFIX_CURRENCIES.items():
+        if ticker_symbol.endswith(suffix):
+            return code, 1.0
+    return 'USD', 1.0
+
+
+def _fetch_info(ticker_symbol: str) -> dict:
+    import yfinance as yf
+
+    try:
+        info = yf.Ticker(ticker_symbol).info
+        if not info:
+            return {'error': f"{ticker_symbol} 티커명을 확인해주세요."}
+        return info
+    except KeyError:
+        return {'error': f"{ticker_symbol} 티커명을 확인해주세요."}
+    except json.decoder.JSONDecodeError:
+        return {'error': "시세 서버 응답을 읽지 못했습니다. 잠시 후 다시 시도해주세요."}
+    except Exception as e:
+        return {'error': f"티커 조회 중 오류가 발생했습니다: {e}"}
+
+
+# 메타데이터는 티커별로 캐시 (세션 공유). 어떤 묶음·순서로 조회해도 같은 티커는 한 번만 요청
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_ticker_info(ticker_symbol: str) -> dict:
+    return _fetch_info(ticker_symbol)
+
+
+def get_ticker_infos(ticker_symbols: tuple) -> dict:
+    """여러 티커의 메타데이터. 캐시에 없는 티커만 병렬로 요청된다."""
+    symbols = list(dict.fromkeys(ticker_symbols))
+    if len(symbols) <= 1:
+        return {symbol: get_ticker_info(symbol) for symbol in symbols}
+    with ThreadPoolExecutor(max_workers=min(8, len(symbols))) as pool:
+        return dict(zip(symbols, pool.map(get_ticker_info, symbols)))
+
+
+# 보유 종목 현재가를 한 번의 일괄 요청으로 조회 (상장 통화, 보조 단위는 환산)
+@st.cache_data(ttl=QUOTE_TTL, show_spinner=False)
+def get_latest_quotes(ticker_symbols: tuple) -> dict:
+    import yfinance as yf
+
+    symbols = list(dict.fromkeys(ticker_symbols))
+    if not symbols:
+        return {}
+    bars = yf.download(symbols, period='5d', interval='1d', group_by='ticker', auto_adjust=False,
+                       progress=False, threads=False)
+    if bars is None or bars.empty:
+        return {}
+    if not isinstance(bars.columns, pd.MultiIndex):
+        bars = pd.concat({symbols[0]: bars}, axis=1)
+
+    # 배율은 보조 단위 시장 종목만 메타데이터로 확인 (나머지는 접미사로 추정, 배율 1)
+    infos = get_ticker_infos(tuple(symbol for symbol in symbols if symbol.endswith(MINOR_UNIT_SUFFIXES)))
+    quotes = {}
+    for symbol in symbols:
+        if symbol not in bars.columns.get_level_values(0):
+            continue
+        close = bars[symbol]['Close'].dropna()
+        if not close.empty:
+            quotes[symbol] = float(close.iloc[-1]) * listing_currency(symbol, infos.get(symbol))[1]
+    return quotes
+
+
+def with_live_prices(stock_list: list[dict], manual=()) -> list[dict]:
+    """manual 에 없는 종목의 현재가(stock_current)를 최신 시세로 바꾼 새 목록."""
+    # 정렬한 티커 묶음을 키로 써서 같은 종목 구성의 세션끼리 캐시 공유
+    quotes = get_latest_quotes(tuple(sorted({stock['stock_name'] for stock in stock_list})))
+    return [{**stock, 'stock_current': quotes[stock['stock_name']]}
+            if stock['stock_name'] in quotes and stock['stock_name'] not in manual else stock
+            for stock in stock_list]
+
+
+# 종목별 일봉을 디스크(parquet)에 보관. 메타데이터에 어느 날짜부터 받았는지 기록
+# yfinance / pyarrow 는 임포트 비용이 커서 시세가 필요한 함수 안에서 불러온다 (홈/피드백 페이지 시작 속도)
+COVERAGE_KEY = b'coverage_start'
+
+
+def _price_path(ticker_symbol: str) -> str:
+    return os.path.join(CACHE_DIR, 'prices', f"{ticker_symbol}.parquet")
+
+
+def _store_covers(path: str, start: str | None) -> bool:
+    """저장본이 신선하고 요청 시작일을 포함하는지 (스키마 메타데이터만 읽음)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    try:
+        if time.time() - os.path.getmtime(path) > PRICE_TTL:
+            return False
+        covered = (pq.read_schema(path).metadata or {}).get(COVERAGE_KEY, b'').decode()
+    except (OSError, ValueError, pa.ArrowException):
+        return False
+    # period='max' 로 받은 저장본은 모든 시작일을 포함
+    return covered == 'max' or (start is not None and covered != '' and covered <= start)
+
+
+def _read_store(path: str, start: str | None, end: str | None, columns: list | None = None) -> pd.DataFrame:
+    # 필요한 기간의 행과 필요한 열만 읽음 (row group / column chunk 단위로 건너뜀)
+    import pyarrow.parquet as pq
+
+    filters = []
+    if start is not None:
+        filters.append(('Date', '>=', pd.Timestamp(start)))
+    if end is not None:
+        filters.append(('Date', '<=', pd.Timestamp(end)))
+    if columns is not None:
+        columns = [col for col in columns if col in pq.read_schema(path).names]
+    return pd.read_parquet(path, columns=columns, filters=filters or None)
+
+
+def _write_store(path: str, history: pd.DataFrame, start: str | None) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    table = pa.Table.from_pandas(history)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), COVERAGE_KEY: (start or 'max').encode()})
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    os.close(fd)
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+
+
+def _fetch_history(ticker_symbol: str, start: str | None) -> pd.DataFrame:
+    # 배당을 직접 재투자하므로 배당 조정 전 종가를 받는다
+    import yfinance as yf
+
+    ticker = yf.Ticker(ticker_symbol)
+    if start is None:
+        history = ticker.history(interval='1d', period='max', auto_adjust=False)
+    else:
+        history = ticker.history(interval='1d', start=start, auto_adjust=False)
+    if history.empty:
+        return history
+    history.index = pd.to_datetime(history.index.strftime('%Y-%m-%d'))
+    history.index.name = 'Date'
+    if 'Dividends' not in history.columns:
+        history['Dividends'] = 0.0
+    return history
+
+
+@st.cache_data(ttl=PRICE_TTL, show_spinner=False)
+def get_price_history(ticker_symbol: str, start: str | None = None, end: str | None = None,
+                      fields: tuple | None = None) -> pd.DataFrame:
+    """start~end(YYYY-MM-DD, None 이면 제한 없음) 일봉과 그 기간의 배당 재투자 지수.
+
+    fields 를 주면 그 열만 읽어 돌려준다 (없는 필드는 NaN).
+    """
+    columns = None
+    if fields is not None:
+        # TotalReturn 은 종가와 배당으로 계산
+        needed = [field for field in fields if field != 'TotalReturn']
+        columns = list(dict.fromkeys(needed + (['Close', 'Dividends'] if 'TotalReturn' in fields else [])))
+
+    path = _price_path(ticker_symbol)
+    if _store_covers(path, start):
+        history = _read_store(path, start, end, columns)
+    else:
+        history = _fetch_history(ticker_symbol, start)
+        if history.empty:
+            return history
+        _write_store(path, history, start)
+        if end is not None:
+            history = history.loc[:end]
+        if columns is not None:
+            history = history.reindex(columns=columns)
+
+    if not history.empty and (fields is None or 'TotalReturn' in fields):
+        history['TotalReturn'] = total_return_index(history['Close'], history['Dividends'])
+    return history if fields is None else history.reindex(columns=list(fields))
+
+
+def fx_symbol(currency: str, base: str = BASE_CURRENCY) -> str:
+    return f"{currency}{base}=X"
+
+
+# 통화별 일별 환율 (기준 통화 1.0 포함). 통화 하나 추가 = 캐시된 시계열 하나
+@st.cache_data(ttl=PRICE_TTL, show_spinner=False)
+def get_fx_matrix(currencies: tuple, base: str = BASE_CURRENCY, start: str | None = None,
+                  end: str | None = None) -> pd.DataFrame:
+    series = {}
+    for currency in dict.fromkeys(currencies):
+        if currency == base:
+            continue
+        history = get_price_history(fx_symbol(currency, base), start, end, ('Close',))
+        if history.empty:
+            raise ValueError(f"{currency}/{base} 환율 데이터를 가져오지 못했습니다.")
+        series[currency] = history['Close']
+
+    matrix = pd.DataFrame(series).sort_index().ffill()
+    matrix[base] = 1.0
+    return matrix
+
+
+def latest_fx_rates(currencies: tuple, base: str = BASE_CURRENCY) -> dict:
+    # 기준 통화뿐이면 환율 행렬이 빈 표라 조회하지 않음 (원화 종목만 담은 포트폴리오)
+    if all(currency == base for currency in currencies):
+        return {base: 1.0}
+    # 현재 환율만 필요하므로 최근 한 달만 읽음
+    start = (pd.Timestamp.today().normalize() - pd.Timedelta(days=31)).strftime('%Y-%m-%d')
+    matrix = get_fx_matrix(tuple(currencies), base, start)
+    return matrix.ffill().iloc[-1].to_dict()
+
+
+PRICE_FIELDS = ('Open', 'High', 'Low', 'Close', 'Adj Close', 'Dividends', 'Capital Gains', 'TotalReturn')
+PANEL_FIELDS = ('Close', 'Dividends', 'TotalReturn')  # 분석 페이지가 읽는 필드
+
+
+def convert_panel(values: np.ndarray, index: pd.DatetimeIndex, fields: tuple, currencies: list, scales: list,
+                  base: str = BASE_CURRENCY) -> np.ndarray:
+    """(날짜 × 필드 × 티커) 배열의 가격 필드를 기준 통화로 한 번의 브로드캐스트 곱으로 변환한다."""
+    start = index[0].strftime('%Y-%m-%d') if len(index) else None
+    fx_matrix = get_fx_matrix(tuple(currencies), base, start)
+    rates = fx_matrix.reindex(fx_matrix.index.union(index)).ffill().bfill().reindex(index)
+    rates[base] = 1.0
+    factors = rates[currencies].to_numpy() * np.asarray(scales)  # (날짜, 티커)
+    is_price = np.array([field in PRICE_FIELDS for field in fields])
+    values[:, is_price, :] *= factors[:, None, :]
+    return values
+
+# 주기 -> (resample 규칙, 연간 봉 수)
+RESOLUTIONS = {'D': (None, 252), 'W': ('W-FRI', 52), 'M': ('ME', 12)}
+
+# 지정되지 않은 열(종가, 배당 재투자 지수 등)은 기간 마지막 값
+FIELD_AGGREGATIONS = {'Open': 'first', 'High': 'max', 'Low': 'min', 'Volume': 'sum', 'Dividends': 'sum',
+                      'Capital Gains': 'sum', 'Stock Splits': 'sum'}
+
+
+def periods_per_year(resolution: str = 'D') -> int:
+    return RESOLUTIONS[resolution][1]
+
+
+def resample_panel(panel: pd.DataFrame, rule: str) -> pd.DataFrame:
+    """필드별 집계 규칙으로 패널을 한 번에 리샘플링한다. 열의 첫 레벨(단일 레벨이면 열 이름)이 필드."""
+    how = pd.Series([FIELD_AGGREGATIONS.get(field, 'last') for field in panel.columns.get_level_values(0)])
+    # 열마다 agg 를 부르지 않고 같은 집계끼리 묶어서 계산
+    parts = [getattr(panel.iloc[:, positions].resample(rule), func)()
+             for func, positions in how.groupby(how).groups.items()]
+    resampled = pd.concat(parts, axis=1)[panel.columns].dropna(how='all')
+    if panel.dtypes.nunique() == 1:
+        # 다시 하나의 연속 배열로
+        return pd.DataFrame(resampled.to_numpy(dtype=panel.dtypes.iloc[0]), index=resampled.index,
+                            columns=panel.columns)
+    return resampled
+
+
+@st.cache_data
+def stock_df(labels, base_currency=BASE_CURRENCY, resolution='D', start=None, end=None, fields=PANEL_FIELDS,
+             dtype='float64', complete_rows=True):
+    """(Field, Ticker) MultiIndex 열을 가진 패널. 값은 하나의 연속 2D 배열이고 가격 필드는 기준 통화.
+
+    fields 로 필요한 필드만 읽고, dtype='float32' 로 캐시 메모리를 절반으로 줄일 수 있다.
+    complete_rows=False 면 상장 기간이 다른 종목을 함께 담도록 결측 행을 남긴다 (배치 분석용).
+    """
+    fields = tuple(fields)
+    rule = RESOLUTIONS[resolution][0]
+    if rule is not None:
+        # 일간 패널(캐시)을 한 번만 리샘플링
+        return resample_panel(stock_df(labels, base_currency, 'D', start, end, fields, dtype, complete_rows), rule)
+
+    infos = get_ticker_infos(tuple(labels))
+    histories = {}
+    for symbol in dict.fromkeys(labels):
+        try:
+            stock_data = get_price_history(symbol, start, end, fields)
+            if stock_data.empty:
+                print(f"No data for {symbol}")
+                continue
+            histories[symbol] = stock_data
+        except Exception as e:
+            print(f"Error fetching data for {symbol}: {e}")
+
+    if not histories:
+        raise ValueError("No data frames were created. Check the symbols and internet connection.")
+
+    # 모든 날짜 기준으로 (날짜 × 필드 × 티커) 배열 하나에 채움
+    symbols = list(histories)
+    index = histories[symbols[0]].index
+    for history in list(histories.values())[1:]:
+        index = index.union(history.index)
+    values = np.full((len(index), len(fields), len(symbols)), np.nan)
+    for j, history in enumerate(histories.values()):
+        values[index.get_indexer(history.index), :, j] = history.to_numpy(dtype=float)
+
+    # 가격 필드만 상장 통화 -> 기준 통화로 변환, 거래량 등은 그대로
+    listing = [listing_currency(symbol, infos.get(symbol)) for symbol in symbols]
+    values = convert_panel(values, index, fields, [currency for currency, _ in listing],
+                           [scale for _, scale in listing], base_currency)
+
+    # 결측값 없는 행만 추출
+    complete = ~np.isnan(values).any(axis=(1, 2)) if complete_rows else np.ones(len(index), dtype=bool)
+    columns = pd.MultiIndex.from_product([fields, symbols], names=['Field', 'Ticker'])
+    return pd.DataFrame(values[complete].reshape(int(complete.sum()), -1).astype(dtype, copy=False),
+                        index=index[complete], columns=columns)
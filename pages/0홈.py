@@ -1,15 +1,28 @@
 import streamlit as st
-import yfinance as yf
 import json
-from ui_theme import apply_theme
-
-apply_theme("주식 포트폴리오 관리", hide_streamlit_chrome=True)
-
-
-# Function to delete a stock from the list
-def delete_stock(index):
-    del st.session_state.stock_list[index]
-    st.success("삭제완료")
+from market_data import CURRENCY_UNITS, UNIT_BY_CURRENCY, get_latest_quotes, listing_currency
+from positions import (read_position_file, validate_positions, positions_to_records,
+                       positions_frame, apply_editor_changes)
+from portfolio_db import save_portfolio, list_portfolios, load_portfolio, load_snapshot
+from settings import auto_price_setting
+from ui_theme import apply_theme, next_page_button
+
+apply_theme("주식 포트폴리오 관리", hide_streamlit_chrome=True, plotly_template=False)
+
+
+# 그리드 편집 내용을 한 번에 반영
+def apply_holdings_edit():
+    changes = st.session_state.holdings_editor
+    st.session_state.stock_list, st.session_state.holdings_errors = apply_editor_changes(
+        st.session_state.stock_list, changes
+    )
+
+# 보유 종목 표에 반영되지 않은 편집(검증 오류, 입력 중인 새 행)이 남아 있는지
+def holdings_editing() -> bool:
+    changes = st.session_state.get("holdings_editor") or {}
+    holdings_errors = st.session_state.get("holdings_errors")
+    return any(changes.get(part) for part in ("edited_rows", "added_rows", "deleted_rows")) or \
+        (holdings_errors is not None and not holdings_errors.empty)
 
 st.title('주식 포트폴리오 관리')
 
@@ -32,104 +45,189 @@ with coln:
 if "stock_list" not in st.session_state:
     st.session_state.stock_list = []
 
-# Form for adding new stocks
-with st.form(key="form"):
-    col1, col2 = st.columns(2)
-    with col1:
-        stock_name = st.text_input(label="티커")
-    with col2:
-        price_unit = st.selectbox(
-            "화폐단위",
-            ("USD($)", "원(₩)")
-        )
-
-    col3, col4, col5 = st.columns(3)
-    with col3:
-        stock_num = st.text_input(label="보유수")
-    with col4:
-        stock_current = st.text_input(label="현재가")
-    with col5:
-        stock_price = st.text_input(label="평단가")
-
-    add = st.form_submit_button(label="추가")
-
-    # Validation
-    if add:
-        valid_input = True
-
-        stock_name = stock_name.upper()
-
-        try:
-            info = yf.Ticker(stock_name).info
-            quote_type = info.get('quoteType')
-            if quote_type not in ['EQUITY', 'ETF']:
-                st.error("지원하지 않은 티커 입니다.")
+# 현재가 자동 갱신 (수동 유지 종목 제외)
+auto_price = auto_price_setting(paused=holdings_editing())
+
+# 저장된 포트폴리오 (로컬 SQLite)
+@st.fragment
+def saved_portfolio_section():
+    with st.expander("포트폴리오 저장 / 불러오기"):
+        col_save, col_load = st.columns(2)
+        with col_save:
+            portfolio_name = st.text_input("포트폴리오 이름", value=st.session_state.get("portfolio_name", ""))
+            if st.button("저장"):
+                # 편집 영역과 따로 실행되므로 클릭 시점의 목록으로 확인
+                if not st.session_state.stock_list:
+                    st.error("저장할 종목이 없습니다.")
+                elif portfolio_name.strip():
+                    st.session_state.portfolio_id = save_portfolio(portfolio_name.strip(), st.session_state.stock_list)
+                    st.session_state.portfolio_name = portfolio_name.strip()
+                    st.success(f"{portfolio_name} 저장완료")
+                else:
+                    st.error("포트폴리오 이름을 입력해주세요.")
+        with col_load:
+            saved_portfolios = list_portfolios()
+            if saved_portfolios:
+                selected_portfolio = st.selectbox("저장된 포트폴리오", saved_portfolios, format_func=lambda p: p['name'])
+                if st.button("불러오기"):
+                    name, stock_list = load_portfolio(selected_portfolio['id'])
+                    st.session_state.stock_list = stock_list
+                    st.session_state.portfolio_id = selected_portfolio['id']
+                    st.session_state.portfolio_name = name
+                    # 편집 영역까지 새 목록으로 그리도록 전체 다시 실행
+                    st.toast(f"{name} 불러오기 완료")
+                    st.rerun()
+            else:
+                st.caption("저장된 포트폴리오가 없습니다.")
+
+        if "portfolio_id" in st.session_state:
+            snapshot = load_snapshot(st.session_state.portfolio_id, "evaluation", st.session_state.stock_list)
+            if snapshot:
+                config = f" · {snapshot['config']}" if 'config' in snapshot else ""
+                st.caption(f"최근 평가 결과 ({snapshot['created_at']}{config})")
+                st.dataframe(snapshot['summary'], hide_index=True, width='stretch')
+
+saved_portfolio_section()
+
+# Form for adding new stocks + 보유 종목 편집 (이 영역만 다시 실행)
+@st.fragment
+def portfolio_editor():
+    with st.form(key="form"):
+        col1, col2 = st.columns(2)
+        with col1:
+            stock_name = st.text_input(label="티커")
+        with col2:
+            price_unit = st.selectbox(
+                "화폐단위",
+                tuple(CURRENCY_UNITS)
+            )
+
+        col3, col4, col5 = st.columns(3)
+        with col3:
+            stock_num = st.text_input(label="보유수")
+        with col4:
+            stock_current = st.text_input(label="현재가", placeholder="자동" if auto_price else "")
+        with col5:
+            stock_price = st.text_input(label="평단가")
+
+        add = st.form_submit_button(label="추가")
+
+        # Validation
+        if add:
+            valid_input = True
+
+            stock_name = stock_name.upper()
+
+            # yfinance 는 종목을 추가할 때만 필요하므로 여기서 임포트 (홈 화면 시작 속도)
+            import yfinance as yf
+
+            info = None
+            try:
+                info = yf.Ticker(stock_name).info
+                quote_type = info.get('quoteType')
+                if quote_type not in ['EQUITY', 'ETF']:
+                    st.error("지원하지 않은 티커 입니다.")
+                    valid_input = False
+
+            except KeyError:
+                st.error(f"{stock_name} 티커명을 확인해주세요.")
+                valid_input = False
+            except json.decoder.JSONDecodeError:
+                st.error("시세 서버 응답을 읽지 못했습니다. 잠시 후 다시 시도해주세요.")
+                valid_input = False
+            except Exception as e:
+                st.error(f"티커 조회 중 오류가 발생했습니다: {e}")
+                valid_input = False
+
+            # 상장 통화(메타데이터, 없으면 티커 접미사)와 화폐단위 비교
+            expected_currency, _ = listing_currency(stock_name, info)
+            expected_unit = UNIT_BY_CURRENCY.get(expected_currency)
+            if expected_unit is None:
+                st.error(f"지원하지 않는 통화입니다: {expected_currency}")
+                valid_input = False
+            elif price_unit != expected_unit:
+                st.error(f"{stock_name}의 화폐단위는 {expected_unit}이어야 합니다.")
+                valid_input = False
+
+
+            try:
+                stock_num = float(stock_num)
+            except ValueError:
+                st.error("주식 수량은 숫자여야 합니다.")
                 valid_input = False
 
-        except KeyError:
-            st.error(f"{stock_name} 티커명을 확인해주세요.")
-            valid_input = False
-        except json.decoder.JSONDecodeError:
-            st.error("시세 서버 응답을 읽지 못했습니다. 잠시 후 다시 시도해주세요.")
-            valid_input = False
-        except Exception as e:
-            st.error(f"티커 조회 중 오류가 발생했습니다: {e}")
-            valid_input = False
-
-        try:
-            if (stock_name.endswith('.KS') or stock_name.endswith('.KQ')) and price_unit != '원(₩)':
-                st.error("한국 주식의 화폐단위는 원(₩)이어야 합니다.")
+            # 자동 갱신 중이면 비워 둔 현재가를 시세로 채움
+            if auto_price and not stock_current.strip() and valid_input:
+                try:
+                    stock_current = get_latest_quotes((stock_name,)).get(stock_name, '')
+                except Exception as e:
+                    st.error(f"{stock_name} 시세를 가져오지 못했습니다: {e}")
+
+            try:
+                stock_current = float(stock_current)
+            except ValueError:
+                st.error("현재가는 숫자여야 합니다.")
                 valid_input = False
-            elif ('.KS' not in stock_name and '.KQ' not in stock_name) and price_unit != 'USD($)':
-                st.error("외국 주식의 화폐단위는 USD($)이어야 합니다.")
+
+            try:
+                stock_price = float(stock_price)
+            except ValueError:
+                st.error("평단가는 숫자여야 합니다.")
                 valid_input = False
 
-        except ValueError:
-            st.error("화폐 단위 확인해주세요.")
-            valid_input = False
-
-
-        try:
-            stock_num = float(stock_num)
-        except ValueError:
-            st.error("주식 수량은 숫자여야 합니다.")
-            valid_input = False
-
-        try:
-            stock_current = float(stock_current)
-        except ValueError:
-            st.error("현재가는 숫자여야 합니다.")
-            valid_input = False
-
-        try:
-            stock_price = float(stock_price)
-        except ValueError:
-            st.error("평단가는 숫자여야 합니다.")
-            valid_input = False
-
-        if valid_input:
-            st.session_state.stock_list.append({
-                "stock_name": stock_name,
-                "stock_num": stock_num,
-                "stock_current" : stock_current,
-                "stock_price": stock_price,
-                "currency_unit": price_unit
-            })
-            st.success(f"{stock_name} 추가완료")
-
-
-# Displaying the portfolio
-st.subheader('내 포트폴리오')
-for i, stock in enumerate(st.session_state.stock_list):
-    col1, col2 = st.columns([4, 1])
-    with col1:
-        st.write(
-            f"{i + 1}. 티커: {stock['stock_name']}, 보유수: {stock['stock_num']}, 현재가: {stock['stock_current']} ,평단가: {stock['stock_price']}, {stock['currency_unit']}")
-    with col2:
-        delete_button = st.button(f"삭제 {i + 1}", key=f"delete_{i}")
-        if delete_button:
-            delete_stock(i)
-            st.rerun()  # Reload the app to reflect the changes
-
-if st.button("완료"):
-    st.switch_page("pages/1비중.py")
+            if valid_input:
+                st.session_state.stock_list.append({
+                    "stock_name": stock_name,
+                    "stock_num": stock_num,
+                    "stock_current" : stock_current,
+                    "stock_price": stock_price,
+                    "currency_unit": price_unit
+                })
+                st.success(f"{stock_name} 추가완료")
+
+    # 증권사 내보내기 파일 일괄 등록
+    with st.expander("파일로 일괄 추가 (CSV / Excel)"):
+        st.caption("헤더: 티커, 보유수, 현재가, 평단가, 화폐단위(생략 시 티커로 추정)")
+        uploaded_file = st.file_uploader("포트폴리오 파일", type=["csv", "xlsx"], key="position_file")
+        if uploaded_file is not None and st.button("일괄 추가"):
+            try:
+                raw_positions = read_position_file(uploaded_file)
+            except Exception as e:
+                st.error(f"파일을 읽지 못했습니다: {e}")
+            else:
+                with st.spinner("티커 검증 중..."):
+                    valid_positions, position_errors = validate_positions(raw_positions)
+
+                if not position_errors.empty:
+                    st.error(f"{len(position_errors)}개 행에 오류가 있어 제외했습니다.")
+                    st.dataframe(position_errors, hide_index=True, width='stretch')
+                if not valid_positions.empty:
+                    st.session_state.stock_list.extend(positions_to_records(valid_positions))
+                    st.success(f"{len(valid_positions)}개 종목 추가완료")
+
+
+    # Displaying the portfolio
+    st.subheader('내 포트폴리오')
+    st.data_editor(
+        positions_frame(st.session_state.stock_list),
+        key="holdings_editor",
+        on_change=apply_holdings_edit,
+        num_rows="dynamic",
+        hide_index=True,
+        width='stretch',
+        column_config={
+            "stock_name": st.column_config.TextColumn("티커", required=True),
+            "stock_num": st.column_config.NumberColumn("보유수", min_value=0, required=True),
+            "stock_current": st.column_config.NumberColumn("현재가", min_value=0, required=True),
+            "stock_price": st.column_config.NumberColumn("평단가", min_value=0, required=True),
+            "currency_unit": st.column_config.SelectboxColumn("화폐단위", options=list(CURRENCY_UNITS)),
+        },
+    )
+    holdings_errors = st.session_state.get("holdings_errors")
+    if holdings_errors is not None and not holdings_errors.empty:
+        st.error("반영되지 않은 변경이 있습니다.")
+        st.dataframe(holdings_errors, hide_index=True, width='stretch')
+
+portfolio_editor()
+
+next_page_button("pages/1비중.py", "완료")
@@ -1,27 +1,19 @@
 import streamlit as st
 import plotly.express as px
 import plotly.graph_objects as go
-from collections import defaultdict
-import yfinance as yf
 import pandas as pd
 import numpy as np
-import json
-from ui_theme import apply_theme
+from market_data import get_ticker_infos, currency_code, latest_fx_rates
+from sectors import sector_exposure, sector_totals
+from settings import auto_price_setting
+from ui_theme import apply_theme, next_page_button
 
 apply_theme("포트폴리오 요약")
+auto_price_setting()
 
-def get_ticker_short_name(ticker_symbol):
-    ticker = yf.Ticker(ticker_symbol)
-    info = ticker.info
-    short_name = info.get('shortName', 'N/A')  # 'shortName' 키가 없을 경우 'N/A'로 반환
-    return short_name
-
-# 최근 환율 계산기
-def get_usd_to_krw_exchange_rate():
-    ticker = 'KRW=X'
-    data = yf.Ticker(ticker).history(period="1d")
-    latest_data = data.iloc[-1]
-    return round(latest_data['Close'],2)
+def get_short_names(ticker_symbols):
+    infos = get_ticker_infos(tuple(ticker_symbols))
+    return [infos[ticker].get('shortName', 'N/A') for ticker in ticker_symbols]  # 'shortName' 키가 없을 경우 'N/A'로 반환
 
 def format_value(value):
     if isinstance(value, (int, float)):
@@ -38,52 +30,14 @@ def format_value(value):
     else:
         return "N/A"
 
-def get_info_sector(tickers):
-    sectors = []
-    for ticker in tickers:
-        try:
-            ticker_obj = yf.Ticker(ticker)
-            info = ticker_obj.info
-
-            if 'sector' in info:
-                sectors.append(info['sector'])
-            elif info.get('quoteType') == 'ETF':
-                sectors.append('ETF')
-            else:
-                sectors.append('Unknown')
-
-        except (KeyError, json.decoder.JSONDecodeError, ValueError):
-            sectors.append('Unknown')
-        except Exception as e:
-            # 예외 로그 출력 (Streamlit에 표시 가능)
-            st.warning(f"{ticker} 정보를 가져오지 못했습니다: {e}")
-            sectors.append('Unknown')
-    return sectors
-
-
 @st.cache_data
 def ploty_sector(tickers, values):
-    # 섹터 리스트 생성
-    sectors = get_info_sector(tickers)
-
-    # 각 티커의 shortName을 가져오기
-    short_names = [get_ticker_short_name(ticker) for ticker in tickers]
-
-    # 중복 카테고리 합산
-    category_values = defaultdict(float)
-    for sector, value in zip(sectors, values):
-        category_values[sector] += value
-
-    # 합산된 데이터로부터 카테고리와 값 리스트 생성
-    unique_categories = list(category_values.keys())
-    summed_values = list(category_values.values())
-
-    # 전체 값 계산
-    total = sum(summed_values)
+    # ETF는 보유 종목 기준으로 섹터 노출을 분해 (디스크 캐시 사용)
+    exposure = sector_exposure(tickers, values)
 
-    # 퍼센트로 변환하고 내림차순으로 정렬
-    percentages = [(value / total * 100, category) for category, value in zip(unique_categories, summed_values)]
-    percentages.sort(reverse=True, key=lambda x: x[0])
+    # 섹터별 합산 후 퍼센트로 변환 (내림차순)
+    totals = sector_totals(exposure)
+    percentages = list(zip(totals / totals.sum() * 100, totals.index))
 
     # 정렬된 순서에 따라 차트 생성
     fig_sector = go.Figure()
@@ -121,10 +75,11 @@ def ploty_sector(tickers, values):
         ))
 
     # 섹터 트리맵 데이터프레임 생성 시, shortName을 사용하여 레이블 지정
+    short_names = dict(zip(tickers, get_short_names(tickers)))
     df = pd.DataFrame({
-        'Sector': sectors,
-        'Ticker': short_names,  # 여기서 shortNames을 사용
-        'Price': values
+        'Sector': exposure['Sector'],
+        'Ticker': exposure['Ticker'].map(short_names),  # 여기서 shortNames을 사용
+        'Price': exposure['Value']
     })
 
     fig_tree = px.treemap(df, path=[px.Constant("Portfolio"), 'Sector', 'Ticker'], values='Price',
@@ -161,15 +116,13 @@ if "stock_list" in st.session_state and st.session_state.stock_list:
     st.subheader('내 포트폴리오')
 
     # 주식 목록 출력
-    labels_name = []
-    labels = []
-    for i, stock in enumerate(st.session_state.stock_list):
-        short_name = get_ticker_short_name(stock['stock_name'])
-        labels_name.append(short_name)
-        labels.append(stock['stock_name'])
+    labels = [stock['stock_name'] for stock in st.session_state.stock_list]
+    labels_name = get_short_names(labels)
+    for i, (stock, short_name) in enumerate(zip(st.session_state.stock_list, labels_name)):
         st.write(f"{i + 1}. 티커: {short_name}, 보유수: {stock['stock_num']}, 현재가 : {stock['stock_current']}, 평단가: {stock['stock_price']}, 화폐: {stock['currency_unit']}")
 
-    usd_to_krw = get_usd_to_krw_exchange_rate()
+    # 보유 통화별 최신 환율 (기준 통화: 원)
+    fx_rates = latest_fx_rates(tuple(currency_code(stock['currency_unit']) for stock in st.session_state.stock_list))
     # 파이차트를 위한 데이터 준비
     values = []
     for stock in st.session_state.stock_list:
@@ -180,9 +133,7 @@ if "stock_list" in st.session_state and st.session_state.stock_list:
             st.error(f"유효하지 않은 데이터 형식: {stock}")
             continue
 
-        total_value = stock_num * stock_current
-        if stock['currency_unit'] == 'USD($)':
-            total_value *= usd_to_krw  # Convert USD to KRW
+        total_value = stock_num * stock_current * fx_rates[currency_code(stock['currency_unit'])]
         values.append(total_value)
 
     fig_pie = ploty_pie_portfolio(labels_name, values)
@@ -195,6 +146,5 @@ if "stock_list" in st.session_state and st.session_state.stock_list:
 else:
     st.write("포트폴리오에 주식이 없습니다.")
 
-if st.button("다음"):
-    st.switch_page("pages/2개별 분석.py")
+next_page_button("pages/2개별 분석.py")
 
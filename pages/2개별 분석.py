@@ -1,17 +1,23 @@
 import streamlit as st
-import yfinance as yf
 import plotly.graph_objects as go
 import plotly.express as px
 import pandas as pd
-from ui_theme import apply_theme
+from analytics import performance_metrics
+from fundamentals import get_balance_sheet, get_financials, get_recommendations, refresh_fundamentals
+from market_data import get_price_history, get_ticker_infos, listing_currency, periods_per_year, stock_df
+from regression import BENCHMARKS, regression_stats
+from settings import date_window_setting, resolution_setting
+from ui_theme import apply_theme, next_page_button
 
 apply_theme("개별 분석")
+resolution = resolution_setting()
+start, end = date_window_setting()
 
 
 # 티커 이름 변환
 def get_ticker_short_name(ticker_symbol):
-    ticker = yf.Ticker(ticker_symbol)
-    info = ticker.info
+    # 메타데이터는 캐시된 조회를 재사용 (재실행마다 요청하지 않음)
+    info = get_ticker_infos((ticker_symbol,))[ticker_symbol]
     short_name = info.get('shortName', 'N/A')  # 'shortName' 키가 없을 경우 'N/A'로 반환
     return short_name
 
@@ -47,10 +53,31 @@ def format_won(value):
         return "N/A"
 
 
+# 시장 베타 추정 (제공 값이 없을 때): 상장 시장 지수 대비 최근 일간 수익률 회귀
+@st.cache_data
+def estimate_beta(ticker_symbol, years=5):
+    if ticker_symbol.endswith('.KQ'):
+        benchmark = BENCHMARKS['KOSDAQ']
+    elif ticker_symbol.endswith('.KS'):
+        benchmark = BENCHMARKS['KOSPI']
+    else:
+        benchmark = BENCHMARKS['S&P 500']
+    try:
+        prices = pd.concat({ticker_symbol: get_price_history(ticker_symbol, fields=('TotalReturn',))['TotalReturn'],
+                            benchmark: get_price_history(benchmark, fields=('TotalReturn',))['TotalReturn']},
+                           axis=1, join='inner')
+    except Exception:
+        return None
+    returns = prices.iloc[-years * 252:].pct_change().dropna()
+    if len(returns) < 60:
+        return None
+    stats = regression_stats(returns[[ticker_symbol]], returns[[benchmark]])
+    return round(float(stats['Beta'].iloc[0]), 2)
+
+
 # 주식 지표
 def get_financial_metrics(ticker_symbol):
-    ticker = yf.Ticker(ticker_symbol)
-    info = ticker.info
+    info = get_ticker_infos((ticker_symbol,))[ticker_symbol]
     dtype = info.get('quoteType')  # 자산 종류
 
     # 코스피, 코스닥
@@ -61,7 +88,7 @@ def get_financial_metrics(ticker_symbol):
         per = info.get('forwardPE', 0)  # PER
         roe = info.get('returnOnEquity', 0) * 100  # ROE
         psr = info.get('priceToSalesTrailing12Months', 0)  # PSR
-        beta = info.get('beta')  # 시장 베타 계수
+        beta = info.get('beta') or estimate_beta(ticker_symbol)  # 시장 베타 계수
         roa = info.get('returnOnAssets', 0) * 100  # ROA
 
     else:
@@ -71,7 +98,7 @@ def get_financial_metrics(ticker_symbol):
         per = info.get('forwardPE', 0)  # PER
         roe = info.get('returnOnEquity', 0) * 100  # ROE
         psr = info.get('priceToSalesTrailing12Months', 0)  # PSR
-        beta = info.get('beta')  # 시장 베타 계수
+        beta = info.get('beta') or estimate_beta(ticker_symbol)  # 시장 베타 계수
         roa = info.get('returnOnAssets', 0) * 100  # ROA
 
     return {
@@ -87,10 +114,11 @@ def get_financial_metrics(ticker_symbol):
     }
 
 
-# 재무제표
+# 재무제표 (디스크 캐시, 분기 단위 갱신)
 def get_fundamental_data(ticker_symbol):
-    ticker = yf.Ticker(ticker_symbol)
-    financials = ticker.financials
+    financials = get_financials(ticker_symbol)
+    if financials is None:
+        return None, None
 
     if 'Operating Income' in financials.index:
         financials_df = financials.loc[['Total Revenue', 'Operating Income', 'Net Income'], :].dropna(axis=1)
@@ -133,8 +161,9 @@ def get_fundamental_data(ticker_symbol):
 
 # 부채비율,
 def get_ratio(ticker_symbol):
-    ticker = yf.Ticker(ticker_symbol)
-    balance_sheet = ticker.balance_sheet
+    balance_sheet = get_balance_sheet(ticker_symbol)
+    if balance_sheet is None:
+        return None
     ratio_columns = ['Total Equity Gross Minority Interest', 'Total Liabilities Net Minority Interest',
                      'Current Assets',
                      'Current Liabilities']
@@ -164,10 +193,11 @@ def get_ratio(ticker_symbol):
     return fig
 
 
-# 애널리스트 추천
+# 애널리스트 추천 (디스크 캐시, 하루 단위 갱신)
 def get_recommend(ticker_symbol):
-    ticker = yf.Ticker(ticker_symbol)
-    recommendations = ticker.recommendations
+    recommendations = get_recommendations(ticker_symbol)
+    if recommendations is None:
+        return None
     recommendations = recommendations[::-1]
 
     fig = px.bar(recommendations, x="period", y=['strongSell', 'sell', 'hold', 'buy', 'strongBuy'],
@@ -179,18 +209,17 @@ def get_recommend(ticker_symbol):
     return fig
 
 
-@st.cache_data
-def stock_df(label):
-    ticker = yf.Ticker(label)
-    stock_data = ticker.history(interval='1d', period='max')
-    stock_data.columns = [f"{label}_{col}" for col in stock_data.columns]
-    return stock_data
+def close_df(label, resolution='D', start=None, end=None):
+    # 다른 페이지와 같은 가격 저장소/기간 조회를 쓰되, 평단가와 비교하도록 상장 통화로 둠
+    currency, _ = listing_currency(label, get_ticker_infos((label,))[label])
+    panel = stock_df([label], base_currency=currency, resolution=resolution, start=start, end=end, fields=('Close',))
+    return pd.DataFrame({f'{label}_Close': panel['Close'][label]})
 
 
 def ohlc_plot(data, label, price):
     # Calculate cumulative return and CAGR
     data = calculate_cumulative_return(data, label)
-    cagr = calculate_cagr(data, label)
+    cagr = performance_metrics(data[[f'{label}_Close']])['CAGR'].iloc[0]
 
     # Create a line plot for the close price
     fig = go.Figure()
@@ -235,17 +264,8 @@ def calculate_cumulative_return(data, label):
     return data
 
 
-def calculate_cagr(data, label):
-    start_price = data[f'{label}_Close'].iloc[0]
-    end_price = data[f'{label}_Close'].iloc[-1]
-    n_years = (data.index[-1] - data.index[0]).days / 252  # Convert days to years
-    cagr = (end_price / start_price) ** (1 / n_years) - 1
-    return cagr
-
-
 @st.cache_data
-def mdd_stock(DataFrame, stock_name):
-    window = 252
+def mdd_stock(DataFrame, stock_name, window=252):
     peak = DataFrame[f'{stock_name}_Close'].rolling(window, min_periods=1).max()
     drawdown = DataFrame[f'{stock_name}_Close'] / peak - 1.0
     max_dd = drawdown.rolling(window, min_periods=1).min()
@@ -281,20 +301,19 @@ if "stock_list" in st.session_state and st.session_state.stock_list:
         with tab:
             stock_name_ticker = get_ticker_short_name(labels[i])
             st.subheader(stock_name_ticker)
-            df = stock_df(labels[i])
+            df = close_df(labels[i], resolution, start, end)
 
             # 각 탭에서 Plotly 그래프 그리기
             stock_name = labels[i]
             stock_price = stock_mean_price[i]
-            ticker = yf.Ticker(stock_name)
-            info = ticker.info
+            info = get_ticker_infos((stock_name,))[stock_name]
             dtype = info.get('quoteType')
 
             fig_ohlc = ohlc_plot(df, stock_name, stock_price)
             st.plotly_chart(fig_ohlc, key=f"ohlc_chart_{i}")
 
             # DD & MDD
-            fig_mdd = mdd_stock(df, stock_name)
+            fig_mdd = mdd_stock(df, stock_name, periods_per_year(resolution))
             st.plotly_chart(fig_mdd, key=f"mdd_stock_chart_{i}")
 
             financial_metrics = get_financial_metrics(stock_name)
@@ -312,21 +331,30 @@ if "stock_list" in st.session_state and st.session_state.stock_list:
                 col7.metric("Beta", financial_metrics['Beta'])
                 col8.metric("ROA", financial_metrics['ROA'])
 
+                # 저장된 재무 데이터를 지우고 다시 받기
+                if st.button("재무 데이터 새로고침", key=f"refresh_fundamentals_{i}"):
+                    refresh_fundamentals(stock_name)
+
                 fig_fundamental, fig_eps = get_fundamental_data(stock_name)
                 fig_recommend = get_recommend(stock_name)
                 fig_ratio = get_ratio(stock_name)
-                st.plotly_chart(fig_fundamental, key=f"fundamental_chart_{i}")
-                if fig_eps is not None:
-                    st.plotly_chart(fig_eps, key=f"eps_chart_{i}")
-                if fig_ratio is not None:
-                    st.plotly_chart(fig_ratio, key=f"ratio_chart_{i}")
-                st.plotly_chart(fig_recommend, key=f"recommend_chart_{i}")
+                if fig_fundamental is not None:
+                    st.plotly_chart(fig_fundamental, key=f"fundamental_chart_{i}")
+                else:
+                    st.caption("재무제표를 가져오지 못했습니다.")
+                if fig_eps is not None:
+                    st.plotly_chart(fig_eps, key=f"eps_chart_{i}")
+                if fig_ratio is not None:
+                    st.plotly_chart(fig_ratio, key=f"ratio_chart_{i}")
+                if fig_recommend is not None:
+                    st.plotly_chart(fig_recommend, key=f"recommend_chart_{i}")
 
             elif dtype == 'ETF' and not (stock_name.endswith('.KS') or stock_name.endswith('.KQ')):
                 col1, col2, col3, col4 = st.columns(4)
                 col1.metric("Total Assets", format_usd(info['totalAssets']))
                 col2.metric("Dividend Yield", round(float(info['yield']), 3))
-                col3.metric("beta3Year", round(float(info['beta3Year']), 3))
+                beta_3y = info.get('beta3Year')
+                col3.metric("beta3Year", round(float(beta_3y), 3) if beta_3y is not None else estimate_beta(stock_name, 3))
                 col4.metric("NavPrice", info['navPrice'])
 
                 st.write('')
@@ -382,8 +410,7 @@ if "stock_list" in st.session_state and st.session_state.stock_list:
                 )
                 st.write('')
 
-    if st.button("다음"):
-        st.switch_page("pages/3포트폴리오 분석.py")
+    next_page_button("pages/3포트폴리오 분석.py")
 
 else:
     st.write("포트폴리오에 주식이 없습니다.")
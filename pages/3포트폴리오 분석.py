@@ -1,141 +1,116 @@
 import streamlit as st
-import yfinance as yf
 import numpy as np
 import pandas as pd
 import plotly.express as px
-import plotly.figure_factory as ff
-from ui_theme import apply_theme
+import plotly.graph_objects as go
+from analytics import calendar_year_returns, fft_kde, METRIC_FORMATS, performance_metrics
+from market_data import get_ticker_infos, periods_per_year, stock_df
+from portfolio_analysis import normalized_prices
+from regression import BENCHMARKS, ROLLING_WINDOWS, regression_stats, rolling_regression
+from settings import date_window_setting, resolution_setting, window_periods
+from ui_theme import apply_theme, next_page_button
 
 apply_theme("포트폴리오 분석")
+resolution = resolution_setting()
+start, end = date_window_setting()
 
 
 # 티커 영문명
 def get_ticker_short_name(ticker_symbol):
-    ticker = yf.Ticker(ticker_symbol)
-    info = ticker.info
+    # 메타데이터는 캐시된 조회를 재사용 (재실행마다 요청하지 않음)
+    info = get_ticker_infos((ticker_symbol,))[ticker_symbol]
     short_name = info.get('shortName', 'N/A')  # 'shortName' 키가 없을 경우 'N/A'로 반환
     return short_name
 
 
-# 환율 데이터
-@st.cache_data
-def get_krw_usd():
-    ticker = 'KRW=X'
-    data = yf.Ticker(ticker).history(period="1d")
-    latest_data = data.iloc[-1]
-    return latest_data['Close']
-
-
-@st.cache_data
-def stock_df(labels, KRW):
-    data_frames = []
-    all_dates = set()
-
-    for symbol in labels:
-        try:
-            ticker = yf.Ticker(symbol)
-            stock_data = ticker.history(interval='1d', period='max')
-            stock_data.index = pd.to_datetime(stock_data.index.strftime('%Y-%m-%d'))
-
-            if stock_data.empty:
-                print(f"No data for {symbol}")
-                continue
-
-            # 열 이름을 심볼과 연결하여 중복되지 않도록 함
-            stock_data.columns = [f"{symbol}_{col}" for col in stock_data.columns]
-
-            # 미국 주식에 대해 환율 변환 적용
-            if not symbol.endswith(('.KS', '.KQ')):
-                stock_data = stock_data * KRW
-
-            # 모든 날짜를 수집
-            all_dates.update(stock_data.index)
-
-            # 데이터 프레임을 리스트에 추가
-            data_frames.append(stock_data)
-        except Exception as e:
-            print(f"Error fetching data for {symbol}: {e}")
-
-    if not data_frames:
-        raise ValueError("No data frames were created. Check the symbols and internet connection.")
-
-    # 모든 날짜를 인덱스로 사용하여 빈 데이터 프레임 생성
-    all_dates = sorted(all_dates)  # 날짜를 정렬
-    combined_data = pd.DataFrame(index=all_dates)
-
-    # 모든 데이터 프레임을 날짜 기준으로 합침
-    for df in data_frames:
-        combined_data = combined_data.join(df, how='outer')
-
-    # 결측값 없는 행만 추출
-    result_df = combined_data.dropna()
-
-    return result_df
-
 
 @st.cache_data
 def total_return(dataframe, labels):
-    data = pd.DataFrame(index=dataframe.index)
-
-    for label in labels:
-        label_close_col = f'{label}_Close'
-        label_dividends_col = f'{label}_Dividends'
-        data[f'{label}'] = dataframe[label_close_col] + dataframe[label_dividends_col]
-
-    log_norm_data = data.div(data.iloc[0]).mul(100)
-    log_norm_df = np.log1p(log_norm_data)
-
-    return data, log_norm_data
+    # 배당 재투자 지수 (종목별 가격 이력과 함께 캐시됨)
+    data = dataframe['TotalReturn'][labels]
+    return data, normalized_prices(data)
 
 
 @st.cache_data
-def yoy_return_risk(data):
-    daily_ret = data.pct_change()
-    annual_ret = daily_ret.mean() * 252  # 연간 기대 수익률 계산
-
-    # 일간 수익률의 표준편차 (변동성)
-    daily_volatility = daily_ret.std()
-    # 연간화된 변동성 계산
-    annual_volatility = daily_volatility * np.sqrt(252)
-
-    return annual_ret, annual_volatility
+def metrics_table(data, periods=252):
+    # 전 종목 성과 지표 (CAGR, 변동성, 샤프, MDD 등) 한 번에
+    return performance_metrics(data, periods)
 
 
 @st.cache_data
 def yoy_return_hist(dataframe, labels):
-    daily_returns = dataframe.pct_change().dropna()
-
-    # 각 주식별 연도별 첫 번째 값과 마지막 값을 추출하여 연간 수익률 계산
-    annual_returns = daily_returns.groupby([daily_returns.index.year]).apply(lambda x: x.mean() * 252 * 100)
-
-    # 구간화를 위한 범위 설정
-    min_return = annual_returns.min().min()
-    max_return = annual_returns.max().max()
-    bins = np.arange(min_return, max_return, 5)
-
-    # 주식별 수익률 데이터 준비
-    hist_data = [annual_returns[col].dropna().values for col in labels]
-
-    # Plotly의 create_distplot 함수를 사용하여 시각화
-    fig = ff.create_distplot(
-        hist_data, labels, bin_size=bins, show_rug=True, show_hist=False
-    )
-
-    # 범례 이름 변경
-    for trace, new_name in zip(fig.data, labels):
-        trace.name = new_name
+    # 연도별 복리 수익률 (%)
+    annual_returns = calendar_year_returns(dataframe[labels]) * 100
+
+    # FFT 기반 밀도 추정 (전 자산 한 번에)
+    grid, density = fft_kde(annual_returns)
+
+    fig = go.Figure()
+    colors = px.colors.qualitative.Plotly
+    for i, label in enumerate(labels):
+        color = colors[i % len(colors)]
+        fig.add_trace(go.Scatter(x=grid, y=density[label], mode='lines', name=label,
+                                 legendgroup=label, line=dict(color=color)))
+        # rug: 실제 연간 수익률 위치
+        fig.add_trace(go.Scatter(x=annual_returns[label].dropna(), y=[0] * annual_returns[label].count(),
+                                 mode='markers', name=label, legendgroup=label, showlegend=False,
+                                 marker=dict(symbol='line-ns-open', size=12, color=color)))
 
     # 그래프 반환
     return fig
 
 
+@st.cache_data
+def market_sensitivity(dataframe, labels, weights, benchmark_symbols, window, resolution='D', start=None, end=None):
+    # 보유 종목 + 현재 비중 포트폴리오를 한 번에 회귀 (원화 기준 수익률)
+    returns = dataframe['TotalReturn'][labels].pct_change()
+    returns['Portfolio'] = returns[labels] @ weights
+
+    bench_df = stock_df(list(benchmark_symbols), resolution=resolution, start=start, end=end, fields=('TotalReturn',))
+    bench_returns = bench_df['TotalReturn'][list(benchmark_symbols)].pct_change()
+
+    periods = periods_per_year(resolution)
+    return (regression_stats(returns, bench_returns, periods),
+            rolling_regression(returns, bench_returns, window, periods))
+
+
+# 벤치마크/창 변경 시 이 영역만 다시 실행
+@st.fragment
+def market_sensitivity_section(df, labels, rename_labels, weights, resolution, start, end):
+    st.subheader('시장 민감도 (베타)')
+    col_bench, col_window = st.columns(2)
+    with col_bench:
+        benchmark_names = st.multiselect("벤치마크", list(BENCHMARKS), default=['KOSPI', 'S&P 500'])
+    with col_window:
+        window = st.selectbox("이동 창(영업일)", ROLLING_WINDOWS, index=1)
+
+    if not benchmark_names:
+        return
+    benchmark_symbols = tuple(BENCHMARKS[name] for name in benchmark_names)
+    stats_df, rolling_df = market_sensitivity(df, labels, weights, benchmark_symbols,
+                                              window_periods(window, resolution), resolution, start, end)
+
+    stats_df['Benchmark'] = stats_df['Benchmark'].map({symbol: name for name, symbol in BENCHMARKS.items()})
+    stats_df['Asset'] = stats_df['Asset'].map(dict(zip(labels, rename_labels))).fillna(stats_df['Asset'])
+    st.dataframe(stats_df.set_index(['Benchmark', 'Asset']).round(3), width='stretch')
+    st.caption("Alpha, Tracking Error 는 연율화 · 배당 재투자 원화 수익률 기준")
+
+    fig_beta = go.Figure()
+    for name, symbol in zip(benchmark_names, benchmark_symbols):
+        rolling_beta = rolling_df[('Beta', symbol, 'Portfolio')]
+        fig_beta.add_trace(go.Scatter(x=rolling_beta.index, y=rolling_beta, mode='lines', name=name))
+    fig_beta.update_layout(title=f'Portfolio Rolling Beta ({window}D)', xaxis_title='Date', yaxis_title='Beta')
+    st.plotly_chart(fig_beta, width='stretch')
+
+
 if "stock_list" in st.session_state and st.session_state.stock_list:
     st.title('포트폴리오 분석')
     # 원본 데이터
     labels = [stock['stock_name'] for stock in st.session_state.stock_list]
     rename_labels = [get_ticker_short_name(ticker) for ticker in labels]
 
-    df = stock_df(labels, get_krw_usd())
+    df = stock_df(labels, resolution=resolution, start=start, end=end, fields=('Close', 'TotalReturn'),
+                  dtype='float32')
 
     # 성장률 비교
     total_df, log_total_df = total_return(df, labels)
@@ -160,13 +135,13 @@ if "stock_list" in st.session_state and st.session_state.stock_list:
     st.plotly_chart(fig_line)
 
     st.subheader('연간 수익 & 리스크')
-    # 연간 수익률, 변동성 비교
-    annual_ret, annual_volatility = yoy_return_risk(total_df)
-    
+    # 연간 수익률(CAGR), 변동성 비교
+    metrics = metrics_table(total_df, periods_per_year(resolution))
+
     # 데이터프레임 생성하여 plotly가 자동으로 색상 및 범례 처리
     plot_df = pd.DataFrame({
-        'Risk': annual_volatility,
-        'Return': annual_ret,
+        'Risk': metrics['Volatility'],
+        'Return': metrics['CAGR'],
         'Label': rename_labels
     })
     
@@ -192,6 +167,7 @@ if "stock_list" in st.session_state and st.session_state.stock_list:
 
     # Plotly 차트 렌더링
     st.plotly_chart(fig_scatter)
+    st.dataframe(metrics.set_axis(rename_labels).style.format(METRIC_FORMATS, na_rep='-'), width='stretch')
 
     # 일간 변동성 히스토그램
     st.subheader('연간 수익률 히스토그램')
@@ -213,8 +189,13 @@ if "stock_list" in st.session_state and st.session_state.stock_list:
     )
     st.plotly_chart(fig_hist)
 
-    if st.button("다음"):
-        st.switch_page("pages/4포트폴리오 평가.py")
+    # 시장 민감도: 벤치마크별 알파/베타
+    # 현재 평가금액 비중 (가격은 이미 원화 환산)
+    values = np.array([stock['stock_num'] for stock in st.session_state.stock_list]) \
+        * df['Close'][labels].iloc[-1].to_numpy()
+    market_sensitivity_section(df, labels, rename_labels, values / values.sum(), resolution, start, end)
+
+    next_page_button("pages/4포트폴리오 평가.py")
 
 else:
     st.title('포트폴리오')
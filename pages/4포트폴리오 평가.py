@@ -1,15 +1,27 @@
 import streamlit as st
-import yfinance as yf
 import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
-from ui_theme import apply_theme
+import datetime
+from allocation import ALLOCATORS, zero_variance_assets
+from analytics import METRIC_FORMATS, performance_metrics
+from covariance import COV_ESTIMATORS, estimate_covariance
+from market_data import stock_df, currency_code, get_ticker_infos, latest_fx_rates, periods_per_year
+from portfolio_analysis import buy_and_hold, drawdowns, portfolio_stats, sharpe_frontier
+from portfolio_db import save_snapshot
+from risk import var_table
+from stress import SCENARIOS, stress_test
+from settings import auto_price_setting, date_window_setting, RESOLUTION_LABELS, RESOLUTION_UNITS, resolution_setting
+from ui_theme import apply_theme, next_page_button
 
 apply_theme("포트폴리오 평가")
+resolution = resolution_setting()
+start, end = date_window_setting()
+auto_price_setting()
 
-def get_ticker_short_name(ticker_symbol):
-    ticker = yf.Ticker(ticker_symbol)
-    info = ticker.info
+def get_ticker_short_name(ticker_symbol):
+    # 메타데이터는 캐시된 조회를 재사용 (재실행마다 요청하지 않음)
+    info = get_ticker_infos((ticker_symbol,))[ticker_symbol]
     short_name = info.get('shortName', 'N/A')  # 'shortName' 키가 없을 경우 'N/A'로 반환
     return short_name
 
@@ -27,138 +39,34 @@ def format_value(value):
             return f"{value:.2f}원"
     else:
         return "N/A"
-@st.cache_data
-def get_krw_usd():
-    ticker = 'KRW=X'
-    data = yf.Ticker(ticker).history(period="1d")
-    latest_data = data.iloc[-1]
-    return latest_data['Close']
-@st.cache_data
-def stock_df(labels, KRW):
-    data_frames = []
-    all_dates = set()
-
-    for symbol in labels:
-        try:
-            ticker = yf.Ticker(symbol)
-            stock_data = ticker.history(interval='1d', period='max')
-            stock_data.index = pd.to_datetime(stock_data.index.strftime('%Y-%m-%d'))
-
-            if stock_data.empty:
-                print(f"No data for {symbol}")
-                continue
-
-            # 열 이름을 심볼과 연결하여 중복되지 않도록 함
-            stock_data.columns = [f"{symbol}_{col}" for col in stock_data.columns]
-
-            # 미국 주식에 대해 환율 변환 적용
-            if not symbol.endswith(('.KS', '.KQ')):
-                stock_data = stock_data * KRW
-
-            # 모든 날짜를 수집
-            all_dates.update(stock_data.index)
-
-            # 데이터 프레임을 리스트에 추가
-            data_frames.append(stock_data)
-        except Exception as e:
-            print(f"Error fetching data for {symbol}: {e}")
-
-    if not data_frames:
-        raise ValueError("No data frames were created. Check the symbols and internet connection.")
-
-    # 모든 날짜를 인덱스로 사용하여 빈 데이터 프레임 생성
-    all_dates = sorted(all_dates)  # 날짜를 정렬
-    combined_data = pd.DataFrame(index=all_dates)
-
-    # 모든 데이터 프레임을 날짜 기준으로 합침
-    for df in data_frames:
-        combined_data = combined_data.join(df, how='outer')
-
-    # 결측값 없는 행만 추출
-    result_df = combined_data.dropna()
-
-    return result_df
 
 @st.cache_data
-def sharp_ratio(data, stocks, having_qty, stock_prices, krw_usd_rate):
-    dataframe = pd.DataFrame(index=data.index)
-
-    for stock in stocks:
-        dataframe[stock] = data[f'{stock}_Close']
+def covariance_matrix(data, stocks, method, periods=252):
+    # 추정 방법만 바꿀 때는 이 계산만 다시 수행
+    daily_ret = data['TotalReturn'][stocks].pct_change()
+    return estimate_covariance(daily_ret, method, periods)
 
-    daily_ret = dataframe.pct_change()  # 일간 수익률
-    annual_ret = daily_ret.mean() * 252  # 연간 수익률
-    daily_cov = daily_ret.cov()  # 일간 리스크
-    annual_cov = daily_cov * 252  # 연간 리스크
-
-    port_ret = []
-    port_risk = []
-    port_weights = []
-    sharpe_ratio = []
-
-    # 몬테카를로 시뮬레이션
-    for _ in range(2000):
-        weights = np.random.random(len(stocks))
-        weights /= np.sum(weights)
-
-        returns = np.dot(weights, annual_ret)
-        risk = np.sqrt(np.dot(weights.T, np.dot(annual_cov, weights)))
-
-        port_ret.append(returns)
-        port_risk.append(risk)
-        port_weights.append(weights)
-        sharpe_ratio.append(returns / risk)
-
-    portfolio = {'Returns': port_ret, 'Risk': port_risk, 'Sharpe': sharpe_ratio}
-
-    for i, s in enumerate(stocks):
-        portfolio[s] = [weight[i] for weight in port_weights]
-
-    df = pd.DataFrame(portfolio)
-    df = df[['Returns', 'Risk', 'Sharpe'] + [s for s in stocks]]
-
-    max_sharpe = df.loc[df['Sharpe'] == df['Sharpe'].max()].reset_index(drop=True)
-    min_risk = df.loc[df['Risk'] == df['Risk'].min()].reset_index(drop=True)
-    st.session_state.max_sharpe = max_sharpe
-    st.session_state.min_risk = min_risk
+@st.cache_data
+def risk_budget_weights(data, stocks, cov_method='Sample', periods=252):
+    # 캐시된 공분산으로 위험 균형 배분 (기대수익 추정을 쓰지 않음)
+    cov = covariance_matrix(data, stocks, cov_method, periods).loc[stocks, stocks]
+    return pd.DataFrame({name: allocate(cov) for name, allocate in ALLOCATORS.items()}).T, zero_variance_assets(cov)
 
-    # 환율을 사용하여 가격 변환
-    stock_prices_krw = []
-    for price, symbol in zip(stock_prices, stocks):
-        try:
-            # price가 숫자인지 확인하고 변환
-            price = float(price)
-            if symbol.endswith(('.KS', '.KQ')):
-                stock_prices_krw.append(price)
-            else:
-                stock_prices_krw.append(price * krw_usd_rate)
-        except ValueError:
-            st.error(f"잘못된 가격 값: {price} 심볼: {symbol}")
-            return None  # 오류를 적절히 처리
-
-    # 각 주식의 현재 가치 계산
-    current_values = [qty * price for qty, price in zip(having_qty, stock_prices_krw)]
-
-    # 전체 자산 가치 계산
-    total_value = sum(current_values)
-
-    # 각 주식의 비중 계산
-    hav_weights = [value / total_value for value in current_values]
-
-    # 포트폴리오의 예상 수익률 계산
-    hav_ret = np.dot(annual_ret, hav_weights)
-    # 포트폴리오의 예상 리스크 계산
-    hav_cov = np.dot(hav_weights, np.dot(annual_cov, hav_weights))
-    hav_risk = np.sqrt(hav_cov)
-
-    # 샤프 지수 계산
-    hav_sharpe = hav_ret / hav_risk
+@st.cache_data
+def sharp_ratio(data, stocks, having_qty, stock_prices, fx_rates, cov_method='Sample', periods=252):
+    # 배당 재투자 지수 기준 수익률
+    daily_cov = covariance_matrix(data, stocks, cov_method, periods)  # 주기별 리스크
+    try:
+        # 몬테카를로 시뮬레이션 + 현재 포트폴리오 (환율로 기준 통화 환산)
+        port_df, max_sharpe, min_risk, df = sharpe_frontier(data['TotalReturn'][stocks], daily_cov, having_qty,
+                                                            stock_prices, fx_rates, periods)
+    except ValueError as e:
+        st.error(f"잘못된 가격 값: {e}")
+        return None  # 오류를 적절히 처리
+    hav_ret, hav_risk = port_df.loc[0, 'Returns'], port_df.loc[0, 'Risk']
 
     st.write("Your Portfolio")
-    port_df = pd.DataFrame([[hav_ret, hav_risk, hav_sharpe] + hav_weights], columns = ['Returns', 'Risk', 'Sharpe'] + stocks)
-
-    st.dataframe(port_df, width='stretch', hide_index=True)
-    st.session_state.port_df = port_df
+    st.dataframe(port_df, width='stretch', hide_index=True)
     st.write("Max Sharp Ratio")
     st.dataframe(round(max_sharpe, 4), width='stretch', hide_index=True)
     st.write("Min Risk")
@@ -194,41 +102,20 @@ def sharp_ratio(data, stocks, having_qty, stock_prices, krw_usd_rate):
                       yaxis_title='Expected Returns',
                       width=900, height=600)
 
-    return fig
+    # 캐시 적중 시에도 같은 결과를 쓰도록 세션 대신 반환
+    return fig, port_df, max_sharpe, min_risk, df
 
 def make_df(stock_df, ratio, labels, money):
-    close_columns = [label + '_Close' for label in labels]
     if isinstance(ratio, pd.DataFrame):
         portfolio_series = ratio.iloc[0]
     else:
         portfolio_series = pd.Series(ratio, index=labels)
 
-    portfolio_series.index = portfolio_series.index + '_Close'
-    close_prices = stock_df[close_columns].iloc[0]
-
-    shares = money * portfolio_series / close_prices
-
-    portfolio_value = pd.DataFrame(index=stock_df.index)
-    for ticker in shares.index:
-        close_col = ticker.replace('_Close', '')
-        div_col = ticker.replace('_Close', '_Dividends')
-
-        portfolio_value[ticker.replace('_Close', '_Value')] = shares[ticker] * stock_df[ticker]
-        if div_col in stock_df.columns:
-            portfolio_value[ticker.replace('_Close', '_Dividends')] = shares[ticker] * stock_df[div_col]
-
-    value_cols = portfolio_value.filter(regex='_Value').columns
-    dividend_cols = portfolio_value.filter(regex='_Dividends').columns
-    portfolio_value['TotalValue'] = portfolio_value[value_cols].sum(axis=1) + portfolio_value[dividend_cols].sum(axis=1)
-    portfolio_value['DailyReturns'] = portfolio_value['TotalValue'].pct_change()
-
-    return portfolio_value
+    # 배당 재투자 지수로 매수 후 보유 가치를 한 번에 계산
+    return buy_and_hold(stock_df['TotalReturn'][labels], portfolio_series[labels], money)
 # 예시 mdd_stock 함수
-def mdd_stock(dataframe):
-    window = 252
-    peak = dataframe['TotalValue'].rolling(window, min_periods=1).max()
-    drawdown = dataframe['TotalValue'] / peak - 1.0
-    max_dd = drawdown.rolling(window, min_periods=1).min()
+def mdd_stock(dataframe, window=252):
+    drawdown, max_dd = drawdowns(dataframe['TotalValue'], window)
 
     trace_drawdown = go.Scatter(x=drawdown.index, y=drawdown.values, mode='lines', name='DD',
                                 line=dict(color='#0063B2'))
@@ -245,6 +132,158 @@ def mdd_stock(dataframe):
     fig = go.Figure(data=data, layout=layout)
     return fig, max_dd
 
+@st.cache_data
+def risk_report(data, labels, weights, levels, horizon, cov_method='Sample', periods=252):
+    returns = data['TotalReturn'][labels].pct_change()
+    expected_returns = weights[labels] @ (returns.mean() * periods)
+    cov = covariance_matrix(data, labels, cov_method, periods)
+    return var_table(returns, weights, levels=levels, horizons=(horizon,), cov=cov), expected_returns
+
+@st.cache_data
+def compare_portfolios(data, weights, money):
+    # 비중 행마다 매수 후 보유 가치 (위젯 조작으로 다시 실행돼도 캐시 사용)
+    return [make_df(data, weights.loc[name], list(weights.columns), money) for name in weights.index]
+
+@st.cache_data
+def annual_moments(data, stocks, cov_method='Sample', periods=252):
+    # 연율 평균 벡터와 공분산 행렬 (What-if 계산은 이것만 사용)
+    mean = data['TotalReturn'][stocks].pct_change().mean().to_numpy() * periods
+    return mean, covariance_matrix(data, stocks, cov_method, periods).loc[stocks, stocks].to_numpy() * periods
+
+@st.cache_data
+def stress_report(stocks, weights, scenarios):
+    # 분석 기간/주기와 무관하게 전체 일봉 패널에서 시나리오 구간을 잘라 씀 (종목별 상장일이 달라도 행 유지)
+    panel = stock_df(stocks, resolution='D', fields=('TotalReturn',), complete_rows=False)['TotalReturn']
+    return stress_test(panel, weights, dict(scenarios))
+
+# 사용자 시나리오 편집 내용을 세션에 반영 (다른 페이지를 다녀와도 유지)
+def apply_scenario_edit():
+    changes = st.session_state.custom_scenario_editor
+    rows = [dict(row) for row in st.session_state.get('custom_scenarios', [])]
+    for row, values in changes.get('edited_rows', {}).items():
+        rows[int(row)].update(values)
+    deleted = set(changes.get('deleted_rows', []))
+    st.session_state.custom_scenarios = [row for i, row in enumerate(rows) if i not in deleted] \
+        + changes.get('added_rows', [])
+
+# 사용자 시나리오 편집 시 이 영역만 다시 실행
+@st.fragment
+def stress_section(labels, named_weights):
+    st.subheader('스트레스 시나리오')
+    custom = pd.DataFrame(st.session_state.get('custom_scenarios', []), columns=['Scenario', 'Start', 'End'])
+    with st.expander("사용자 시나리오"):
+        st.data_editor(
+            custom.assign(Start=pd.to_datetime(custom['Start']).dt.date, End=pd.to_datetime(custom['End']).dt.date),
+            key='custom_scenario_editor', on_change=apply_scenario_edit, num_rows='dynamic', hide_index=True,
+            width='stretch',
+            column_config={'Scenario': st.column_config.TextColumn("이름", required=True),
+                           'Start': st.column_config.DateColumn("시작일", required=True),
+                           'End': st.column_config.DateColumn("종료일", required=True)})
+    scenarios = dict(SCENARIOS)
+    for row in custom.dropna().itertuples(index=False):
+        scenarios[row.Scenario] = (pd.Timestamp(row.Start).strftime('%Y-%m-%d'), pd.Timestamp(row.End).strftime('%Y-%m-%d'))
+
+    report = stress_report(labels, named_weights, tuple(scenarios.items()))
+    if report.empty:
+        st.write("보유 종목의 시세 기간에 해당하는 시나리오가 없습니다.")
+        return
+
+    order = list(dict.fromkeys(report['Scenario']))
+    fig_stress = go.Figure()
+    for name, rows in report.groupby('Portfolio', sort=False):
+        fig_stress.add_trace(go.Bar(x=rows['Scenario'], y=rows['Return'], name=name))
+    fig_stress.update_layout(title='Scenario Returns', barmode='group', yaxis_tickformat='.0%',
+                             xaxis=dict(categoryorder='array', categoryarray=order))
+    st.plotly_chart(fig_stress, width='stretch')
+
+    table = report.pivot_table(index='Scenario', columns='Portfolio', values=['Return', 'Max Drawdown', 'Recovery Days'],
+                               sort=False, dropna=False).reindex(order)
+    st.dataframe(table.style.format('{:.2%}', subset=['Return', 'Max Drawdown'], na_rep='-')
+                 .format('{:,.0f}', subset=['Recovery Days'], na_rep='-'), width='stretch')
+    st.caption("시나리오 시작일에 각 비중으로 매수 후 보유 · 배당 재투자, 기준 통화 · 회복: 저점 이후 직전 고점 회복까지 달력일"
+               " (- 는 미회복 또는 시세 없음)")
+
+# 슬라이더를 움직일 때 이 영역만 다시 실행 (시세/공분산을 다시 읽지 않음)
+@st.fragment
+def whatif_section(labels, current_weights, annual_ret, annual_cov):
+    st.subheader('What-if 비중 조정')
+    keys = [f"whatif_{ticker}" for ticker in labels]
+
+    defaults = np.round(np.asarray(current_weights, dtype=float) * 100, 1)
+
+    def reset_weights():
+        for key, default in zip(keys, defaults):
+            st.session_state[key] = float(default)
+
+    # 슬라이더 값은 세션 상태로만 관리 (처음 한 번 현재 비중으로 채움)
+    for key, default in zip(keys, defaults):
+        st.session_state.setdefault(key, float(default))
+
+    st.button("현재 비중으로", on_click=reset_weights)
+    cols = st.columns(3)
+    raw = np.array([cols[j % 3].slider(ticker, 0.0, 100.0, step=0.1, key=key, format="%.1f%%")
+                    for j, (ticker, key) in enumerate(zip(labels, keys))])
+    if raw.sum() <= 0:
+        st.warning("비중 합계가 0 입니다.")
+        return
+    weights = raw / raw.sum()  # 합계가 100% 가 아니면 비율대로 정규화
+
+    ret, risk, sharpe = portfolio_stats(weights, annual_ret, annual_cov)
+    cur_ret, cur_risk, cur_sharpe = portfolio_stats(current_weights, annual_ret, annual_cov)
+    changed = not np.array_equal(raw, defaults)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Returns", f"{ret:.2%}", f"{ret - cur_ret:+.2%}" if changed else None)
+    col2.metric("Risk", f"{risk:.2%}", f"{risk - cur_risk:+.2%}" if changed else None, delta_color="inverse")
+    col3.metric("Sharpe", f"{sharpe:.3f}", f"{sharpe - cur_sharpe:+.3f}" if changed else None)
+    st.caption(f"입력 합계 {raw.sum():.1f}% → 100% 로 정규화 · 현재 포트폴리오 대비 변화")
+
+# 신뢰수준/기간 변경 시 이 영역만 다시 실행
+@st.fragment
+def risk_section(df, labels, named_weights, candidates, cov_method, periods, resolution):
+    st.subheader('리스크 (VaR / CVaR)')
+    col_level, col_horizon = st.columns(2)
+    with col_level:
+        levels = st.multiselect("신뢰수준", [0.9, 0.95, 0.99], default=[0.95, 0.99],
+                                format_func=lambda level: f"{level:.0%}")
+    with col_horizon:
+        # 역사적 VaR 는 겹치는 누적 수익률 표본이 있어야 하므로 수익률 개수보다 짧은 기간만
+        horizons = [horizon for horizon in [1, 5, 10, 21] if horizon < len(df) - 1]
+        horizon = None
+        if horizons:
+            horizon = st.selectbox(f"기간({RESOLUTION_UNITS[resolution]})", horizons,
+                                   index=min(2, len(horizons) - 1))
+
+    if horizon is None:
+        st.warning("분석 기간의 수익률이 너무 적어 VaR 를 계산할 수 없습니다. 기간을 늘리거나 주기를 짧게 해주세요.")
+    elif levels:
+        levels = tuple(sorted(levels))
+        tabList = list(named_weights.index)
+        candidate_weights = candidates[labels].set_axis([f'Candidate {i}' for i in candidates.index])
+        risk_df, expected_returns = risk_report(df, labels, pd.concat([named_weights, candidate_weights]),
+                                                levels, horizon, cov_method, periods)
+
+        named_risk = risk_df[risk_df['Portfolio'].isin(tabList)]
+        risk_pivot = named_risk.pivot_table(index=['Portfolio', 'Method'], columns='Confidence',
+                                            values=['VaR', 'CVaR'], sort=False)
+        risk_pivot.columns = [f"{metric} {level:.0%}" for metric, level in risk_pivot.columns]
+        st.dataframe(risk_pivot.mul(100).round(2), width='stretch')
+        st.caption(f"{horizon}{RESOLUTION_UNITS[resolution]} 손실률(%) · 배당 재투자 기준")
+
+        # 후보 포트폴리오의 기대수익 vs 역사적 CVaR
+        tail_level = levels[-1]
+        candidate_cvar = (risk_df[(risk_df['Method'] == 'Historical') & (risk_df['Confidence'] == tail_level)]
+                          .set_index('Portfolio')['CVaR'])
+        fig_risk = go.Figure()
+        fig_risk.add_trace(go.Scatter(x=candidate_cvar[candidate_weights.index],
+                                      y=expected_returns[candidate_weights.index], mode='markers', name='Portfolios',
+                                      marker=dict(color=candidates['Sharpe'], colorscale='Viridis', size=8)))
+        for name in tabList:
+            fig_risk.add_trace(go.Scatter(x=[candidate_cvar[name]], y=[expected_returns[name]], mode='markers',
+                                          marker=dict(size=16, line=dict(color='black', width=2)), name=name))
+        fig_risk.update_layout(title=f'Historical CVaR {tail_level:.0%} ({horizon}{RESOLUTION_UNITS[resolution]})',
+                               xaxis_title='CVaR', yaxis_title='Expected Returns')
+        st.plotly_chart(fig_risk, width='stretch')
+
 if "stock_list" in st.session_state and st.session_state.stock_list:
     st.title('포트폴리오 평가(샤프지수)')
     labels = [stock['stock_name'] for stock in st.session_state.stock_list]
@@ -261,10 +300,22 @@ if "stock_list" in st.session_state and st.session_state.stock_list:
     stock_mean_price = [stock['stock_price'] for stock in st.session_state.stock_list]
     stock_current_price = [stock['stock_current'] for stock in st.session_state.stock_list]
     qtys = [stock['stock_num'] for stock in st.session_state.stock_list]
-    krw_usd_rate = get_krw_usd()
-    df = stock_df(labels, krw_usd_rate)
-
-    fig = sharp_ratio(df, labels, qtys, stock_current_price, krw_usd_rate)
+    currencies = [currency_code(stock['currency_unit']) for stock in st.session_state.stock_list]
+    fx_rates = latest_fx_rates(tuple(currencies))
+    df = stock_df(labels, resolution=resolution, start=start, end=end, fields=('TotalReturn',))
+    periods = periods_per_year(resolution)
+
+    cov_method = st.selectbox("공분산 추정", list(COV_ESTIMATORS),
+                              help="Sample: 전체 기간 표본 / Ledoit-Wolf: 축소 추정 / EWMA: 최근 가중(일간 λ=0.94)")
+    result = sharp_ratio(df, labels, qtys, stock_current_price, [fx_rates[currency] for currency in currencies],
+                         cov_method, periods)
+    if result is None:
+        st.stop()
+    fig, port_df, max_sharpe, min_risk, candidates = result
+    st.session_state.port_df = port_df
+    st.session_state.max_sharpe = max_sharpe
+    st.session_state.min_risk = min_risk
+    st.session_state.candidates = candidates
     st.subheader('Sharp Portfolio')
     st.plotly_chart(fig)
 
@@ -272,27 +323,34 @@ if "stock_list" in st.session_state and st.session_state.stock_list:
     money = 10000000 # 백만
 
     # 포트폴리오 데이터프레임 생성
-    max_sharpe_df = st.session_state.max_sharpe
-    max_sharpe_df = max_sharpe_df[labels]
-
-    min_risk_df = st.session_state.min_risk
-    min_risk_df = min_risk_df[labels]
-
-    prot_df = st.session_state.port_df
-    prot_df = prot_df[labels]
-
-    # 포트폴리오 가치 계산
-    p1 = make_df(df, prot_df.iloc[0], labels, money)
-    p2 = make_df(df, max_sharpe_df.iloc[0], labels, money)
-    p3 = make_df(df, min_risk_df.iloc[0], labels, money)
-    p4 = make_df(df, [1 / len(labels)] * len(labels), labels, money)  # 균등 비중으로 설정
+    max_sharpe_df = max_sharpe[labels]
+    min_risk_df = min_risk[labels]
+    prot_df = port_df[labels]
+
+    # 저장된 포트폴리오면 마지막 평가 결과와 그 설정을 스냅샷으로 보관 (포트폴리오당 한 행을 덮어씀)
+    if "portfolio_id" in st.session_state:
+        summary = pd.concat([port_df, max_sharpe, min_risk], ignore_index=True)
+        summary.insert(0, 'Portfolio', ['Your Portfolio', 'Max Sharpe Ratio', 'Min Risk'])
+        save_snapshot(st.session_state.portfolio_id, "evaluation", st.session_state.stock_list, {
+            'created_at': datetime.datetime.now().strftime('%Y-%m-%d %H:%M'),
+            'config': f"{RESOLUTION_LABELS[resolution]} · {start or '전체'} ~ {end or '현재'} · {cov_method}",
+            'summary': summary.round(4).to_dict('records'),
+        })
+
+    # 포트폴리오 가치 계산 (Simulation 은 균등 비중, Risk Parity / HRP 는 위험 균형 배분)
+    budget_weights, flat_assets = risk_budget_weights(df, labels, cov_method, periods)
+    if flat_assets:
+        st.caption(f"가격 변동이 없어 Risk Parity / HRP 에서 제외(비중 0): {', '.join(flat_assets)}")
+    tabList = ['Your Portfolio', 'Max Sharpe Ratio', 'Min Risk Ratio', 'Simulation'] + list(budget_weights.index)
+    named_weights = pd.DataFrame([prot_df.iloc[0], max_sharpe_df.iloc[0], min_risk_df.iloc[0],
+                                  pd.Series(1 / len(labels), index=labels)] + [row for _, row in budget_weights.iterrows()],
+                                 index=tabList)
+    dataList = compare_portfolios(df, named_weights, money)
 
     # 그래프 생성
     fig = go.Figure()
-    fig.add_trace(go.Scatter(x=p1.index, y=p1['TotalValue'], mode='lines', name='Your Portfolio'))
-    fig.add_trace(go.Scatter(x=p2.index, y=p2['TotalValue'], mode='lines', name='Max Sharpe Ratio'))
-    fig.add_trace(go.Scatter(x=p3.index, y=p3['TotalValue'], mode='lines', name='Min Risk Ratio'))
-    fig.add_trace(go.Scatter(x=p4.index, y=p4['TotalValue'], mode='lines', name='Simulation'))
+    for name, values in zip(tabList, dataList):
+        fig.add_trace(go.Scatter(x=values.index, y=values['TotalValue'], mode='lines', name=name))
 
     fig.update_layout(
         title='Portfolio Comparison',
@@ -300,28 +358,39 @@ if "stock_list" in st.session_state and st.session_state.stock_list:
         yaxis_title='Values'
     )
 
-    st.plotly_chart(fig, width='stretch')
+    st.plotly_chart(fig, width='stretch')
+
+    # 모든 비교 포트폴리오의 성과 지표를 한 번에
+    metrics = performance_metrics(pd.concat({name: values['TotalValue'] for name, values in zip(tabList, dataList)},
+                                            axis=1), periods)
+    st.dataframe(metrics.style.format(METRIC_FORMATS, na_rep='-'), width='stretch')
 
-    dataList = [p1, p2, p3, p4]
-    tabList = ['Your Portfolio', 'Max Sharpe Ratio', 'Min Risk Ratio', 'Simulation']
     tabs = st.tabs(tabList)
 
     for i, tab in enumerate(tabs):
         with tab:
             dataframe = dataList[i]
-            fig_mdd, mdd = mdd_stock(dataframe)
-            st.plotly_chart(fig_mdd, key=f"mdd_chart_{i}")
-            date_diff = round((dataframe.index[-1] - dataframe.index[0]).days / 365.25, 2)
+            fig_mdd, _ = mdd_stock(dataframe, periods)
+            st.plotly_chart(fig_mdd, key=f"mdd_chart_{i}")
             start_asset = float(dataframe.loc[dataframe.index[0], 'TotalValue'])
             end_asset = float(dataframe.loc[dataframe.index[-1], 'TotalValue'])
             col1, col2, col3, col4 = st.columns(4)
-            col1.metric("Years", date_diff)
+            col1.metric("Years", round(metrics.loc[tabList[i], 'Years'], 2))
             col2.metric("Initial assets", format_value(start_asset))
             col3.metric("Final asset", format_value(end_asset))
-            col4.metric("MDD", f'{round(min(mdd) * 100)} %')
+            col4.metric("MDD", f"{round(metrics.loc[tabList[i], 'MDD'] * 100)} %")
+
+    # 꼬리 위험: 현재/후보 포트폴리오 전체를 한 번에 평가
+    risk_section(df, labels, named_weights, candidates, cov_method, periods, resolution)
+
+    # 역사적 위기 구간 재현 (비교 포트폴리오 전체)
+    stress_section(labels, named_weights)
+
+    # 평균/공분산은 한 번만 계산하고 슬라이더 조작은 O(N²) 갱신만
+    annual_ret, annual_cov = annual_moments(df, labels, cov_method, periods)
+    whatif_section(labels, prot_df.iloc[0].to_numpy(), annual_ret, annual_cov)
 
-    if st.button("다음"):
-        st.switch_page("pages/5포트폴리오 상관관계 분석.py")
+    next_page_button("pages/5포트폴리오 상관관계 분석.py")
 
 else:
     st.title('포트폴리오 평가')
@@ -1,75 +1,31 @@
 import streamlit as st
-import yfinance as yf
 import numpy as np
-import pandas as pd
 import plotly.express as px
-from ui_theme import apply_theme
+from market_data import get_ticker_infos, stock_df
+from settings import date_window_setting, resolution_setting
+from ui_theme import apply_theme, next_page_button
 
 apply_theme("포트폴리오 상관관계 분석")
+resolution = resolution_setting()
+start, end = date_window_setting()
 
 # 티커 영문명 가져오기
-def get_ticker_short_name(ticker_symbol):
-    ticker = yf.Ticker(ticker_symbol)
-    info = ticker.info
+def get_ticker_short_name(ticker_symbol):
+    # 메타데이터는 캐시된 조회를 재사용 (재실행마다 요청하지 않음)
+    info = get_ticker_infos((ticker_symbol,))[ticker_symbol]
     short_name = info.get('shortName', 'N/A')  # 'shortName' 키가 없을 경우 'N/A'로 반환
     return short_name
 
-@st.cache_data
-def get_krw_usd():
-    ticker = 'KRW=X'
-    data = yf.Ticker(ticker).history(period="1d")
-    latest_data = data.iloc[-1]
-    return latest_data['Close']
-
-@st.cache_data
-def stock_df(labels, KRW):
-    data_frames = []
-    all_dates = set()
-
-    for symbol in labels:
-        try:
-            ticker = yf.Ticker(symbol)
-            stock_data = ticker.history(interval='1d', period='max')
-            stock_data.index = pd.to_datetime(stock_data.index.strftime('%Y-%m-%d'))
-
-            if stock_data.empty:
-                print(f"No data for {symbol}")
-                continue
-
-            stock_data.columns = [f"{symbol}_{col}" for col in stock_data.columns]
-
-            if not symbol.endswith(('.KS', '.KQ')):
-                stock_data = stock_data * KRW
-
-            all_dates.update(stock_data.index)
-            data_frames.append(stock_data)
-        except Exception as e:
-            print(f"Error fetching data for {symbol}: {e}")
-
-    if not data_frames:
-        raise ValueError("No data frames were created. Check the symbols and internet connection.")
-
-    all_dates = sorted(all_dates)
-    combined_data = pd.DataFrame(index=all_dates)
-
-    for df in data_frames:
-        combined_data = combined_data.join(df, how='outer')
-
-    result_df = combined_data.dropna()
-    return result_df
-
 if "stock_list" in st.session_state and st.session_state.stock_list:
     st.title('자산 상관관계')
 
     labels = [stock['stock_name'] for stock in st.session_state.stock_list]
     short_names = [get_ticker_short_name(ticker) for ticker in labels]
     matrix_height = max(320, min(720, 130 * len(short_names) + 120))
-    df = stock_df(labels, get_krw_usd())
+    df = stock_df(labels, resolution=resolution, start=start, end=end, fields=('TotalReturn',), dtype='float32')
 
-    # 상관계수 데이터프레임 생성
-    corr_df = pd.DataFrame(index=df.index)
-    for stock in labels:
-        corr_df[stock] = df[f'{stock}_Close']
+    # 상관계수 데이터프레임 생성 (배당 재투자 지수 기준)
+    corr_df = df['TotalReturn'][labels]
 
     # 상관계수 계산
     correlation_matrix = round(corr_df.corr(), 2)
@@ -124,8 +80,7 @@ if "stock_list" in st.session_state and st.session_state.stock_list:
     )
     st.plotly_chart(fig_return)
 
-    if st.button("다음"):
-        st.switch_page("pages/6피드백.py")
+    next_page_button("pages/6피드백.py")
 
 else:
     st.title("포트폴리오 상관관계 분석")
@@ -1,91 +1,39 @@
 import streamlit as st
 import datetime
-import requests
-import json
+from feedback_outbox import NOTION_URL, notion_page, notify_worker, start_worker
+from portfolio_db import enqueue_feedback, feedback_counts
 from ui_theme import apply_theme
 
-apply_theme("리뷰")
+apply_theme("리뷰", plotly_template=False)
 
 # 환경 변수에서 API 키와 데이터베이스 ID 가져오기
 api_key = st.secrets["api_key"]
-database_id = st.secrets["database_id"]
-url = 'https://api.notion.com/v1/pages/'
-
-headers = {
-    "Authorization": "Bearer " + api_key,
-    "Content-Type": "application/json",
-    "Notion-Version": "2022-06-28"
-}
-
-# Streamlit UI
-st.title('리뷰')
-with st.form("my_form"):
-    date = datetime.datetime.now().strftime('%Y-%m-%d')  # 날짜를 오늘로 설정
-    st.subheader("피드백")
-
-    txt = st.text_area("피드백 내용을 적어주세요.")
-
-    sentiment_mapping = ["1", "2", "3", "4", "5"]
-    selected = st.feedback("stars")
-
-    submitted = st.form_submit_button("제출")
-    if submitted:
-        # 요청 본문 구성
-        body = {
-            'parent': {
-                'type': 'database_id',
-                'database_id': database_id,
-            },
-            'properties': {
-                '이름': {
-                    'title': [
-                        {
-                            'text': {
-                                'content': 'STREAMLIT_Portfolio'
-                            }
-                        }
-                    ]
-                },
-                '날짜': {  # 날짜 속성
-                    'date': {
-                        'start': date  # 현재 날짜
-                    }
-                },
-                '별점': {  # 별점 속성 (숫자)
-                    'number': int(selected)  # 사용자가 선택한 별점
-                },
-                '텍스트': {  # 텍스트 속성
-                    'rich_text': [
-                        {
-                            'text': {
-                                'content': txt  # 피드백 내용
-                            }
-                        }
-                    ]
-                }
-            },
-            'children': [
-                {
-                    'object': 'block',
-                    'type': 'paragraph',
-                    'paragraph': {
-                        'rich_text': [
-                            {
-                                'type': 'text',
-                                'text': {
-                                    'content': '여기에 추가적인 정보를 입력할 수 있습니다.'
-                                }
-                            }
-                        ]
-                    }
-                }
-            ]
-        }
-
-        # API 요청
-        response = requests.post(url, headers=headers, data=json.dumps(body))
-
-        if response.status_code == 200:
-            st.write(f"감사합니다! 날짜 : {date}")
-        else:
-            st.write(f"문제가 발생했습니다: {response.status_code}, {response.text}")
+database_id = st.secrets["database_id"]
+url = st.secrets.get("notion_url", NOTION_URL)
+
+# 전송은 백그라운드 스레드가 담당 (프로세스당 하나)
+start_worker(url, api_key)
+
+# Streamlit UI
+st.title('리뷰')
+with st.form("my_form"):
+    date = datetime.datetime.now().strftime('%Y-%m-%d')  # 날짜를 오늘로 설정
+    st.subheader("피드백")
+
+    txt = st.text_area("피드백 내용을 적어주세요.")
+
+    selected = st.feedback("stars")
+
+    submitted = st.form_submit_button("제출")
+    if submitted:
+        if selected is None:
+            st.warning("별점을 선택해주세요.")
+        else:
+            # 로컬 outbox 에 먼저 기록하고 바로 응답 (API 가 느리거나 실패해도 피드백은 보존)
+            enqueue_feedback(notion_page(database_id, date, int(selected), txt))
+            notify_worker()
+            st.write(f"감사합니다! 날짜 : {date}")
+
+pending = feedback_counts().get('pending', 0)
+if pending:
+    st.caption(f"전송 대기 중인 피드백 {pending}건")
@@ -0,0 +1,75 @@
+import streamlit as st
+import plotly.graph_objects as go
+from intraday import INTRADAY_INTERVALS, IntradayFeed, intraday_pnl
+from market_data import currency_code, get_ticker_infos, latest_fx_rates, listing_currency
+from ui_theme import apply_theme
+
+apply_theme("장중 모니터링")
+
+
+def live_section(feed, stock_list, fx_rates, scales):
+    try:
+        added = feed.poll()
+    except Exception as e:
+        st.warning(f"분봉을 가져오지 못했습니다: {e}")
+        added = 0
+
+    pnl = intraday_pnl(stock_list, feed, fx_rates, scales)
+    if 'Day P&L' in pnl.columns:
+        col1, col2, col3 = st.columns(3)
+        col1.metric("당일 손익", f"₩ {pnl['Day P&L'].sum():,.0f}")
+        col2.metric("평가 손익", f"₩ {pnl['Unrealized P&L'].sum():,.0f}")
+        col3.metric("새 봉", added)
+        st.dataframe(pnl.set_index('Ticker').style.format({
+            'Last': '{:,.2f}', 'Avg Price': '{:,.2f}', 'Qty': '{:,.0f}', 'Day %': '{:+.2%}', 'Return %': '{:+.2%}',
+            'Day P&L': '₩ {:,.0f}', 'Unrealized P&L': '₩ {:,.0f}'}, na_rep='-'), width='stretch')
+
+    # 종목별 당일 시가 대비 변동률 (서울 시간)
+    closes = feed.closes()
+    fig = go.Figure()
+    for ticker in closes.columns:
+        series = closes[ticker].dropna()
+        if series.empty:
+            continue
+        series = series[series.index.normalize() == series.index[-1].normalize()]
+        fig.add_trace(go.Scatter(x=series.index.tz_convert('Asia/Seoul'), y=series / series.iloc[0] - 1,
+                                 mode='lines', name=ticker))
+    fig.update_layout(title=f'Intraday ({feed.interval})', xaxis_title='Time (KST)', yaxis_title='Change',
+                      yaxis_tickformat='+.1%')
+    st.plotly_chart(fig, width='stretch')
+
+    last_poll = feed.last_poll.tz_convert('Asia/Seoul').strftime('%H:%M:%S') if feed.last_poll is not None else '-'
+    st.caption(f"마지막 조회 {last_poll} · 요청 {feed.polls}회 · 종목당 최대 {INTRADAY_INTERVALS[feed.interval][1]}봉 보관")
+
+
+if "stock_list" in st.session_state and st.session_state.stock_list:
+    st.title('장중 모니터링')
+    stock_list = st.session_state.stock_list
+    labels = [stock['stock_name'] for stock in stock_list]
+
+    col_interval, col_refresh, col_auto = st.columns(3)
+    with col_interval:
+        interval = st.radio("봉 간격", list(INTRADAY_INTERVALS), index=1, horizontal=True)
+    with col_refresh:
+        refresh = st.select_slider("새로고침(초)", [15, 30, 60, 120, 300], value=INTRADAY_INTERVALS[interval][0])
+    with col_auto:
+        auto = st.toggle("자동 새로고침", value=True)
+
+    # 종목/간격이 바뀔 때만 버퍼를 새로 만듦 (그 외에는 증분 폴링)
+    feed_key = (tuple(labels), interval)
+    if st.session_state.get('intraday_key') != feed_key:
+        st.session_state.intraday_feed = IntradayFeed(labels, interval)
+        st.session_state.intraday_key = feed_key
+
+    infos = get_ticker_infos(tuple(labels))
+    scales = {ticker: listing_currency(ticker, infos.get(ticker)) for ticker in labels}
+    fx_rates = latest_fx_rates(tuple({currency_code(stock['currency_unit']) for stock in stock_list}
+                                     | {currency for currency, _ in scales.values()}))
+
+    # 이 영역만 주기적으로 다시 실행 (페이지 나머지는 그대로)
+    st.fragment(run_every=refresh if auto else None)(live_section)(
+        st.session_state.intraday_feed, stock_list, fx_rates, scales)
+
+else:
+    st.title('장중 모니터링')
+    st.write("포트폴리오에 주식이 없습니다.")
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+
+N_SIMULATIONS = 2000
+SUMMARY_COLUMNS = ['Returns', 'Risk', 'Sharpe']
+
+
+def normalized_prices(prices: pd.DataFrame) -> pd.DataFrame:
+    # 첫 값을 100 으로 맞춘 지수
+    return prices.div(prices.iloc[0]).mul(100)
+
+
+def holding_weights(having_qty, stock_prices, fx_rates) -> np.ndarray:
+    """보유 수량 × 현재가(기준 통화 환산) 비중. 숫자가 아닌 가격은 ValueError."""
+    prices = np.array([float(price) for price in stock_prices]) * np.asarray(fx_rates, dtype=float)
+    values = np.asarray(having_qty, dtype=float) * prices
+    return values / values.sum()
+
+
+def portfolio_stats(weights, annual_ret, annual_cov) -> tuple[float, float, float]:
+    """비중 벡터의 연율 수익률/리스크/샤프. 평균 벡터와 공분산만 쓰는 O(N²) 계산이라 시세를 다시 읽지 않는다."""
+    weights = np.asarray(weights, dtype=float)
+    ret = float(weights @ np.asarray(annual_ret, dtype=float))
+    risk = float(np.sqrt(weights @ np.asarray(annual_cov, dtype=float) @ weights))
+    return ret, risk, ret / risk if risk else np.nan
+
+
+def simulate_portfolios(annual_ret: pd.Series, annual_cov: pd.DataFrame, n: int = N_SIMULATIONS,
+                        rng: np.random.Generator | None = None) -> pd.DataFrame:
+    """무작위 비중 n 개의 수익률/리스크/샤프를 행렬 연산 한 번으로 계산한다 (몬테카를로)."""
+    rng = rng or np.random.default_rng()
+    weights = rng.random((n, len(annual_ret)))
+    weights /= weights.sum(axis=1, keepdims=True)
+
+    returns = weights @ annual_ret.to_numpy(dtype=float)
+    risk = np.sqrt(np.einsum('ij,jk,ik->i', weights, annual_cov.to_numpy(dtype=float), weights))
+    df = pd.DataFrame({'Returns': returns, 'Risk': risk, 'Sharpe': returns / risk})
+    return pd.concat([df, pd.DataFrame(weights, columns=list(annual_ret.index))], axis=1)
+
+
+def sharpe_frontier(prices: pd.DataFrame, daily_cov: pd.DataFrame, having_qty, stock_prices, fx_rates,
+                    periods: int = 252, n: int = N_SIMULATIONS, rng: np.random.Generator | None = None):
+    """현재 포트폴리오와 시뮬레이션 중 최대 샤프 / 최소 리스크 포트폴리오.
+
+    반환: (port_df, max_sharpe, min_risk, df) — 모두 Returns, Risk, Sharpe + 종목별 비중 열.
+    """
+    stocks = list(prices.columns)
+    annual_ret = prices.pct_change().mean() * periods
+    annual_cov = daily_cov.loc[stocks, stocks] * periods
+
+    df = simulate_portfolios(annual_ret, annual_cov, n, rng)
+    max_sharpe = df.loc[df['Sharpe'] == df['Sharpe'].max()].reset_index(drop=True)
+    min_risk = df.loc[df['Risk'] == df['Risk'].min()].reset_index(drop=True)
+
+    hav_weights = holding_weights(having_qty, stock_prices, fx_rates)
+    port_df = pd.DataFrame([list(portfolio_stats(hav_weights, annual_ret, annual_cov)) + list(hav_weights)],
+                           columns=SUMMARY_COLUMNS + stocks)
+    return port_df, max_sharpe, min_risk, df
+
+
+def buy_and_hold(prices: pd.DataFrame, weights, money: float) -> pd.DataFrame:
+    """첫날 money 를 weights 대로 매수해 보유한 종목별 가치, TotalValue, DailyReturns."""
+    growth = prices.div(prices.iloc[0])
+    portfolio_value = growth.mul(money * np.asarray(weights, dtype=float), axis=1)
+    portfolio_value.columns = [label + '_Value' for label in prices.columns]
+
+    portfolio_value['TotalValue'] = portfolio_value.sum(axis=1)
+    portfolio_value['DailyReturns'] = portfolio_value['TotalValue'].pct_change()
+    return portfolio_value
+
+
+def drawdowns(values: pd.Series, window: int = 252) -> tuple[pd.Series, pd.Series]:
+    """window 기간 고점 대비 낙폭(DD)과 그 기간의 최대 낙폭(MDD)."""
+    peak = values.rolling(window, min_periods=1).max()
+    drawdown = values / peak - 1.0
+    return drawdown, drawdown.rolling(window, min_periods=1).min()
@@ -0,0 +1,210 @@
+import datetime
+import hashlib
+import json
+import os
+
+from peewee import (AutoField, CharField, DateTimeField, FloatField, ForeignKeyField, IntegerField, Model,
+                    SqliteDatabase, TextField, fn)
+
+
+DB_PATH = os.environ.get(
+    'PORTFOLIO_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'portfolio.db')
+)
+
+db = SqliteDatabase(None, pragmas={'journal_mode': 'wal', 'foreign_keys': 1})
+
+
+class BaseModel(Model):
+    class Meta:
+        database = db
+
+
+class Portfolio(BaseModel):
+    id = AutoField()
+    name = CharField(unique=True)
+    positions_hash = CharField(default='')
+    updated_at = DateTimeField(default=datetime.datetime.now)
+
+
+class Position(BaseModel):
+    portfolio = ForeignKeyField(Portfolio, backref='positions', on_delete='CASCADE')
+    seq = IntegerField()
+    stock_name = CharField()
+    stock_num = FloatField()
+    stock_current = FloatField()
+    stock_price = FloatField()
+    currency_unit = CharField()
+
+    class Meta:
+        indexes = ((('portfolio', 'seq'), True),)
+
+
+# 페이지별 분석 결과 캐시 (포지션 해시가 같을 때만 유효)
+class AnalyticsSnapshot(BaseModel):
+    portfolio = ForeignKeyField(Portfolio, backref='snapshots', on_delete='CASCADE')
+    kind = CharField()
+    positions_hash = CharField()
+    payload = TextField()
+    created_at = DateTimeField(default=datetime.datetime.now)
+
+    class Meta:
+        indexes = ((('portfolio', 'kind'), True),)
+
+
+# 외부 전송 전 피드백을 보관하는 outbox (pending -> sent / failed)
+class FeedbackOutbox(BaseModel):
+    id = AutoField()
+    payload = TextField()
+    status = CharField(default='pending', index=True)
+    attempts = IntegerField(default=0)
+    next_attempt_at = DateTimeField(default=datetime.datetime.now)
+    last_error = TextField(default='')
+    created_at = DateTimeField(default=datetime.datetime.now)
+    sent_at = DateTimeField(null=True)
+
+
+def init_db(path: str = DB_PATH) -> None:
+    if db.database == path:
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    db.init(path)
+    db.create_tables([Portfolio, Position, AnalyticsSnapshot, FeedbackOutbox], safe=True)
+
+
+def _position_values(stock: dict) -> dict:
+    return {
+        'stock_name': stock['stock_name'],
+        'stock_num': float(stock['stock_num']),
+        'stock_current': float(stock['stock_current']),
+        'stock_price': float(stock['stock_price']),
+        'currency_unit': stock['currency_unit'],
+    }
+
+
+# 보유 구성(티커, 수량, 통화)만 해시: 현재가/평단가가 바뀌어도 스냅샷은 유지 (현재가 자동 갱신)
+HASH_COLUMNS = ('stock_name', 'stock_num', 'currency_unit')
+
+
+def positions_hash(stock_list: list[dict]) -> str:
+    rows = [[_position_values(stock)[col] for col in HASH_COLUMNS] for stock in stock_list]
+    return hashlib.sha1(json.dumps(rows, ensure_ascii=False).encode()).hexdigest()
+
+
+def save_portfolio(name: str, stock_list: list[dict]) -> int:
+    """포트폴리오를 저장하고 id 를 돌려준다. 바뀐 포지션만 다시 쓴다."""
+    init_db()
+    new_hash = positions_hash(stock_list)
+    with db.atomic():
+        portfolio, _ = Portfolio.get_or_create(name=name)
+
+        # 해시는 가격을 보지 않으므로 행 단위로 비교해 바뀐 행만 씀
+        changed = False
+        existing = {position.seq: position for position in portfolio.positions}
+        for seq, stock in enumerate(stock_list):
+            values = _position_values(stock)
+            current = existing.pop(seq, None)
+            if current is None:
+                Position.create(portfolio=portfolio, seq=seq, **values)
+                changed = True
+            elif any(getattr(current, key) != value for key, value in values.items()):
+                Position.update(**values).where(Position.id == current.id).execute()
+                changed = True
+
+        if existing:
+            Position.delete().where(Position.id.in_([position.id for position in existing.values()])).execute()
+            changed = True
+
+        if not changed and portfolio.positions_hash == new_hash:
+            return portfolio.id
+        portfolio.positions_hash = new_hash
+        portfolio.updated_at = datetime.datetime.now()
+        portfolio.save()
+    return portfolio.id
+
+
+def list_portfolios() -> list[dict]:
+    init_db()
+    query = Portfolio.select(Portfolio.id, Portfolio.name, Portfolio.updated_at).order_by(Portfolio.updated_at.desc())
+    return list(query.dicts())
+
+
+def load_portfolio(portfolio_id: int) -> tuple[str, list[dict]]:
+    init_db()
+    portfolio = Portfolio.get_by_id(portfolio_id)
+    query = (Position
+             .select(Position.stock_name, Position.stock_num, Position.stock_current,
+                     Position.stock_price, Position.currency_unit)
+             .where(Position.portfolio == portfolio_id)
+             .order_by(Position.seq))
+    return portfolio.name, list(query.dicts())
+
+
+def delete_portfolio(portfolio_id: int) -> None:
+    init_db()
+    Portfolio.delete_by_id(portfolio_id)
+
+
+def save_snapshot(portfolio_id: int, kind: str, stock_list: list[dict], payload: dict) -> None:
+    init_db()
+    (AnalyticsSnapshot
+     .insert(portfolio=portfolio_id, kind=kind, positions_hash=positions_hash(stock_list),
+             payload=json.dumps(payload, ensure_ascii=False, default=str),
+             created_at=datetime.datetime.now())
+     .on_conflict(conflict_target=[AnalyticsSnapshot.portfolio, AnalyticsSnapshot.kind],
+                  preserve=[AnalyticsSnapshot.positions_hash, AnalyticsSnapshot.payload,
+                            AnalyticsSnapshot.created_at])
+     .execute())
+
+
+def load_snapshot(portfolio_id: int, kind: str, stock_list: list[dict]) -> dict | None:
+    """현재 포지션과 같은 해시로 저장된 스냅샷만 돌려준다."""
+    init_db()
+    snapshot = (AnalyticsSnapshot
+                .select(AnalyticsSnapshot.payload)
+                .where((AnalyticsSnapshot.portfolio == portfolio_id)
+                       & (AnalyticsSnapshot.kind == kind)
+                       & (AnalyticsSnapshot.positions_hash == positions_hash(stock_list)))
+                .first())
+    return json.loads(snapshot.payload) if snapshot else None
+
+
+def enqueue_feedback(payload: dict) -> int:
+    init_db()
+    return FeedbackOutbox.create(payload=json.dumps(payload, ensure_ascii=False)).id
+
+
+def due_feedback(limit: int) -> list[dict]:
+    """전송 시각이 된 대기 항목을 오래된 순으로 돌려준다."""
+    init_db()
+    query = (FeedbackOutbox
+             .select(FeedbackOutbox.id, FeedbackOutbox.payload, FeedbackOutbox.attempts)
+             .where((FeedbackOutbox.status == 'pending')
+                    & (FeedbackOutbox.next_attempt_at <= datetime.datetime.now()))
+             .order_by(FeedbackOutbox.id)
+             .limit(limit))
+    return [{**row, 'payload': json.loads(row['payload'])} for row in query.dicts()]
+
+
+def mark_feedback_sent(feedback_id: int) -> None:
+    init_db()
+    (FeedbackOutbox
+     .update(status='sent', sent_at=datetime.datetime.now(), attempts=FeedbackOutbox.attempts + 1, last_error='')
+     .where(FeedbackOutbox.id == feedback_id)
+     .execute())
+
+
+def mark_feedback_failed(feedback_id: int, error: str, retry_at: datetime.datetime | None) -> None:
+    """retry_at 이 None 이면 더 이상 재시도하지 않는다."""
+    init_db()
+    values = {'attempts': FeedbackOutbox.attempts + 1, 'last_error': error[:1000]}
+    if retry_at is None:
+        values['status'] = 'failed'
+    else:
+        values['next_attempt_at'] = retry_at
+    FeedbackOutbox.update(**values).where(FeedbackOutbox.id == feedback_id).execute()
+
+
+def feedback_counts() -> dict:
+    init_db()
+    query = FeedbackOutbox.select(FeedbackOutbox.status, fn.COUNT(FeedbackOutbox.id).alias('count'))
+    return {row['status']: row['count'] for row in query.group_by(FeedbackOutbox.status).dicts()}
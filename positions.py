@@ -0,0 +1,149 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from market_data import (CURRENCY_UNITS, SUPPORTED_QUOTE_TYPES, UNIT_BY_CURRENCY, get_ticker_infos,
+                         listing_currency)
+
+
+POSITION_COLUMNS = ['stock_name', 'stock_num', 'stock_current', 'stock_price', 'currency_unit']
+NUMERIC_COLUMNS = {
+    'stock_num': ("주식 수량은 숫자여야 합니다.", "주식 수량은 0보다 커야 합니다."),
+    'stock_current': ("현재가는 숫자여야 합니다.", "현재가는 0 이상이어야 합니다."),
+    'stock_price': ("평단가는 숫자여야 합니다.", "평단가는 0 이상이어야 합니다."),
+}
+
+# 증권사 내보내기 파일의 헤더 -> 내부 컬럼명
+COLUMN_ALIASES = {
+    '티커': 'stock_name', '종목코드': 'stock_name', 'ticker': 'stock_name', 'symbol': 'stock_name',
+    '보유수': 'stock_num', '수량': 'stock_num', 'quantity': 'stock_num', 'shares': 'stock_num',
+    '현재가': 'stock_current', 'current': 'stock_current', 'price': 'stock_current',
+    '평단가': 'stock_price', '매입가': 'stock_price', 'avg_price': 'stock_price', 'cost': 'stock_price',
+    '화폐단위': 'currency_unit', '통화': 'currency_unit', 'currency': 'currency_unit',
+}
+
+CURRENCY_ALIASES = {
+    **{unit: unit for unit in CURRENCY_UNITS},
+    **UNIT_BY_CURRENCY,
+    '$': 'USD($)', '달러': 'USD($)', '₩': '원(₩)', '원': '원(₩)', '¥': '엔(¥)', '엔': '엔(¥)',
+    'HK$': '홍콩달러(HK$)', '€': '유로(€)', '유로': '유로(€)', '£': '파운드(£)', 'RMB': '위안(CN¥)',
+}
+
+
+def read_position_file(uploaded_file) -> pd.DataFrame:
+    name = getattr(uploaded_file, 'name', '').lower()
+    data = uploaded_file.getvalue() if hasattr(uploaded_file, 'getvalue') else uploaded_file.read()
+
+    if name.endswith(('.xlsx', '.xls')):
+        raw = pd.read_excel(io.BytesIO(data), dtype=str)
+    else:
+        raw = pd.read_csv(io.BytesIO(data), dtype=str, encoding='utf-8-sig')
+
+    raw.columns = [str(col).strip() for col in raw.columns]
+    renamed = raw.rename(columns=lambda col: COLUMN_ALIASES.get(col, COLUMN_ALIASES.get(col.lower(), col)))
+    for col in POSITION_COLUMNS:
+        if col not in renamed.columns:
+            renamed[col] = np.nan
+    return renamed[POSITION_COLUMNS]
+
+
+def validate_positions(raw: pd.DataFrame, check_tickers: bool = True,
+                       row_offset: int = 2) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """전체 행을 한 번에 검증해 (유효 행, 행별 오류) 를 돌려준다."""
+    df = raw.copy()
+    checks = {}
+
+    df['stock_name'] = df['stock_name'].fillna('').astype(str).str.strip().str.upper()
+    checks["티커가 비어 있습니다."] = df['stock_name'] == ''
+
+    for col, (nan_message, range_message) in NUMERIC_COLUMNS.items():
+        values = pd.to_numeric(df[col].astype(str).str.replace(',', '', regex=False).str.strip(), errors='coerce')
+        checks[nan_message] = values.isna()
+        checks[range_message] = (values <= 0) if col == 'stock_num' else (values < 0)
+        df[col] = values
+
+    # 티커 메타데이터는 한 번의 배치 요청으로 조회
+    named = df['stock_name'] != ''
+    infos = get_ticker_infos(tuple(df.loc[named, 'stock_name'])) if check_tickers else {}
+    info = df['stock_name'].map(lambda symbol: infos.get(symbol, {}))
+
+    # 상장 통화는 메타데이터(없으면 티커 접미사)로 판단, 화폐단위가 비어 있으면 상장 통화로 채움
+    expected_currency = df['stock_name'].map(lambda symbol: listing_currency(symbol, infos.get(symbol))[0])
+    expected_unit = expected_currency.map(UNIT_BY_CURRENCY)
+    unit = df['currency_unit'].astype(str).str.strip().map(CURRENCY_ALIASES)
+    df['currency_unit'] = unit.where(df['currency_unit'].notna(), expected_unit)
+    checks["화폐 단위 확인해주세요."] = df['currency_unit'].isna() & expected_unit.notna()
+
+    messages = pd.Series('', index=df.index)
+    for message, mask in checks.items():
+        messages += np.where(mask.fillna(False).astype(bool), f"{message} / ", '')
+
+    unsupported_currency = named & expected_unit.isna()
+    mismatch = named & expected_unit.notna() & df['currency_unit'].notna() & df['currency_unit'].ne(expected_unit)
+    messages += np.where(unsupported_currency, "지원하지 않는 통화입니다: " + expected_currency + " / ", '')
+    messages += np.where(mismatch, "상장 통화의 화폐단위는 " + expected_unit.fillna('') + "이어야 합니다. / ", '')
+
+    if check_tickers:
+        quote_error = info.map(lambda item: item.get('error'))
+        unsupported = named & quote_error.isna() & ~info.map(lambda item: item.get('quoteType')).isin(SUPPORTED_QUOTE_TYPES)
+        quote_error = quote_error.where(~unsupported, "지원하지 않은 티커 입니다.").where(named)
+        messages += quote_error.fillna('')
+
+    messages = messages.str.rstrip(' /')
+    invalid = messages != ''
+    valid_df = df.loc[~invalid, POSITION_COLUMNS]
+    error_df = pd.DataFrame({
+        '행': df.index[invalid] + row_offset,  # 파일은 헤더 1행 + 0-based 보정
+        '티커': df.loc[invalid, 'stock_name'],
+        '오류': messages[invalid],
+    })
+    return valid_df, error_df.reset_index(drop=True)
+
+
+def positions_to_records(valid_df: pd.DataFrame) -> list[dict]:
+    records = valid_df.to_dict('records')
+    for record in records:
+        for col in NUMERIC_COLUMNS:
+            record[col] = float(record[col])
+    return records
+
+
+def positions_frame(stock_list: list[dict]) -> pd.DataFrame:
+    return pd.DataFrame(stock_list, columns=POSITION_COLUMNS)
+
+
+def apply_editor_changes(stock_list: list[dict], changes: dict) -> tuple[list[dict], pd.DataFrame]:
+    """st.data_editor 의 변경분(edited/added/deleted)을 한 번에 반영한다.
+
+    잘못된 수정은 원래 값을 유지하고, 잘못된 추가 행은 버린다.
+    """
+    base = positions_frame(stock_list)
+    deleted = set(changes.get('deleted_rows', []))
+
+    patched = base.copy().astype(object)
+    edited_index = []
+    for row, values in changes.get('edited_rows', {}).items():
+        row = int(row)
+        if row in deleted or row >= len(base):
+            continue
+        for col, value in values.items():
+            if col in POSITION_COLUMNS:
+                patched.at[row, col] = value
+        edited_index.append(row)
+
+    added = pd.DataFrame(changes.get('added_rows', []), columns=POSITION_COLUMNS)
+    added.index = range(len(base), len(base) + len(added))
+    added = added.dropna(how='all')
+
+    candidates = pd.concat([patched.loc[edited_index], added])
+    if candidates.empty:
+        valid, errors = candidates, pd.DataFrame(columns=['행', '티커', '오류'])
+    else:
+        valid, errors = validate_positions(candidates, row_offset=1)
+
+    merged = base.copy().astype(object)
+    merged.loc[valid.index.intersection(base.index)] = valid.loc[valid.index.intersection(base.index)]
+    merged = pd.concat([merged.drop(index=list(deleted), errors='ignore'),
+                        valid.loc[valid.index.difference(base.index)]])
+    return positions_to_records(merged), errors
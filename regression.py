@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+
+BENCHMARKS = {'KOSPI': '^KS11', 'KOSDAQ': '^KQ11', 'S&P 500': '^GSPC'}
+ROLLING_WINDOWS = (63, 126, 252)
+REGRESSION_STATS = ('Alpha', 'Beta', 'R2', 'Tracking Error')
+
+
+def _solve_from_sums(n, sx, sxx, sy, syy, sxy, periods_per_year):
+    """누적 합으로 단일 지수 회귀 y = a + b x 를 (벤치마크 × 자산) 전체에 대해 한 번에 푼다.
+
+    입력 모양: n (...,), sx/sxx (..., B), sy/syy (..., N), sxy (..., B, N)
+    """
+    n = np.asarray(n, dtype=float)[..., None, None]
+    sx, sxx = sx[..., :, None], sxx[..., :, None]
+    sy, syy = sy[..., None, :], syy[..., None, :]
+
+    # 정규방정식 X'X [a, b] = X'y 를 배치로 풀이
+    shape = np.broadcast_shapes(n.shape, sx.shape, sy.shape)
+    xtx = np.empty(shape + (2, 2))
+    xtx[..., 0, 0], xtx[..., 0, 1], xtx[..., 1, 0], xtx[..., 1, 1] = n, sx, sx, sxx
+    xty = np.empty(shape + (2, 1))
+    xty[..., 0, 0], xty[..., 1, 0] = sy, sxy
+    coef = np.linalg.solve(xtx, xty)[..., 0]
+    alpha, beta = coef[..., 0], coef[..., 1]
+
+    sst = syy - sy ** 2 / n
+    ssr = syy - alpha * sy - beta * sxy
+    r2 = 1 - ssr / sst
+
+    # 추적오차: 초과수익(y - x)의 표준편차
+    active_ss = syy - 2 * sxy + sxx
+    active_s = sy - sx
+    tracking = np.sqrt(np.clip((active_ss - active_s ** 2 / n) / (n - 1), 0, None))
+    return alpha * periods_per_year, beta, r2, tracking * np.sqrt(periods_per_year)
+
+
+def _aligned(asset_returns: pd.DataFrame, benchmark_returns: pd.DataFrame) -> tuple[pd.Index, np.ndarray, np.ndarray]:
+    panel = pd.concat({'asset': asset_returns, 'bench': benchmark_returns}, axis=1, join='inner').dropna()
+    return panel.index, panel['asset'].to_numpy(dtype=float), panel['bench'].to_numpy(dtype=float)
+
+
+def regression_stats(asset_returns: pd.DataFrame, benchmark_returns: pd.DataFrame,
+                     periods_per_year: int = 252) -> pd.DataFrame:
+    """모든 자산을 모든 벤치마크에 대해 회귀한다 (Alpha, Tracking Error 는 연율화).
+
+    반환: Benchmark, Asset, Alpha, Beta, R2, Tracking Error 열의 long 포맷.
+    """
+    _, y, x = _aligned(asset_returns, benchmark_returns)
+    stats = _solve_from_sums(len(y), x.sum(axis=0), (x ** 2).sum(axis=0), y.sum(axis=0), (y ** 2).sum(axis=0),
+                             x.T @ y, periods_per_year)
+    frame = pd.DataFrame({
+        'Benchmark': np.repeat(benchmark_returns.columns, asset_returns.shape[1]),
+        'Asset': np.tile(asset_returns.columns, benchmark_returns.shape[1]),
+    })
+    for name, values in zip(REGRESSION_STATS, stats):
+        frame[name] = values.ravel()
+    return frame
+
+
+def rolling_regression(asset_returns: pd.DataFrame, benchmark_returns: pd.DataFrame, window: int = 126,
+                       periods_per_year: int = 252) -> pd.DataFrame:
+    """창 길이 window 의 이동 회귀. 누적 합의 차분으로 모든 창을 한 번에 계산한다.
+
+    반환 열은 (Stat, Benchmark, Asset) MultiIndex.
+    """
+    index, y, x = _aligned(asset_returns, benchmark_returns)
+    if len(index) < window:
+        columns = pd.MultiIndex.from_product([REGRESSION_STATS, benchmark_returns.columns, asset_returns.columns],
+                                             names=['Stat', 'Benchmark', 'Asset'])
+        return pd.DataFrame(columns=columns, dtype=float)
+
+    def window_sums(values):
+        cum = np.concatenate([np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)])
+        return cum[window:] - cum[:-window]
+
+    stats = _solve_from_sums(np.full(len(index) - window + 1, window), window_sums(x), window_sums(x ** 2),
+                             window_sums(y), window_sums(y ** 2), window_sums(x[:, :, None] * y[:, None, :]),
+                             periods_per_year)
+    columns = pd.MultiIndex.from_product([REGRESSION_STATS, benchmark_returns.columns, asset_returns.columns],
+                                         names=['Stat', 'Benchmark', 'Asset'])
+    values = np.concatenate([stat.reshape(len(index) - window + 1, -1) for stat in stats], axis=1)
+    return pd.DataFrame(values, index=index[window - 1:], columns=columns)
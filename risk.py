@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+from scipy.stats import norm
+
+
+CONFIDENCE_LEVELS = (0.95, 0.99)
+HORIZONS = (1, 10, 21)
+VAR_METHODS = ('Historical', 'Parametric', 'Monte Carlo')
+
+
+def horizon_returns(returns: np.ndarray, horizon: int) -> np.ndarray:
+    """일간 수익률(T×k)을 겹치는 horizon 일 누적 수익률로 변환한다."""
+    if horizon == 1:
+        return returns
+    log_cum = np.vstack([np.zeros((1, returns.shape[1])), np.cumsum(np.log1p(returns), axis=0)])
+    return np.expm1(log_cum[horizon:] - log_cum[:-horizon])
+
+
+def empirical_var_cvar(samples: np.ndarray, levels: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """표본(관측×포트폴리오)에서 신뢰수준별 VaR / CVaR(손실, 양수)를 한 번에 구한다. 표본이 없으면 NaN."""
+    n_obs = samples.shape[0]
+    if n_obs == 0:
+        # 기간(horizon)이 관측 수보다 길면 겹치는 누적 수익률이 하나도 없음
+        empty = np.full((len(levels), samples.shape[1]), np.nan)
+        return empty, empty.copy()
+    tail_counts = np.clip(np.ceil((1 - levels) * n_obs).astype(int), 1, n_obs)
+
+    # 전체 정렬 대신 가장 큰 꼬리 구간만 partition 후 정렬
+    k_max = tail_counts.max()
+    tail = samples if k_max == n_obs else np.partition(samples, k_max - 1, axis=0)[:k_max]
+    tail = np.sort(tail, axis=0)
+    var = -tail[tail_counts - 1]
+    cvar = -np.cumsum(tail, axis=0)[tail_counts - 1] / tail_counts[:, None]
+    return var, cvar
+
+
+def parametric_var_cvar(mu: np.ndarray, cov: np.ndarray, weights: np.ndarray, levels: np.ndarray,
+                        horizon: int) -> tuple[np.ndarray, np.ndarray]:
+    port_mu = weights @ mu * horizon
+    port_sigma = np.sqrt(np.einsum('ij,jk,ik->i', weights, cov, weights) * horizon)
+    z = norm.ppf(1 - levels)[:, None]
+    var = -(port_mu[None, :] + z * port_sigma[None, :])
+    cvar = -(port_mu[None, :] - port_sigma[None, :] * norm.pdf(z) / (1 - levels)[:, None])
+    return var, cvar
+
+
+def monte_carlo_var_cvar(mu: np.ndarray, cov: np.ndarray, weights: np.ndarray, levels: np.ndarray,
+                         horizon: int, n_sims: int = 10000, seed: int = 0) -> tuple[np.ndarray, np.ndarray]:
+    # 다변량 정규 분포에서 horizon 일 자산 수익률을 뽑고 모든 포트폴리오에 한 번에 적용
+    rng = np.random.default_rng(seed)
+    chol = np.linalg.cholesky(cov + np.eye(len(mu)) * 1e-12)
+    draws = rng.standard_normal((n_sims, len(mu))) @ chol.T * np.sqrt(horizon) + mu * horizon
+    return empirical_var_cvar(draws @ weights.T, levels)
+
+
+def var_table(returns: pd.DataFrame, weights: pd.DataFrame, levels=CONFIDENCE_LEVELS, horizons=HORIZONS,
+              methods=VAR_METHODS, n_sims: int = 10000, cov: pd.DataFrame | None = None) -> pd.DataFrame:
+    """weights(포트폴리오×자산) 전체를 수익률 패널 한 번의 행렬곱으로 평가한다.
+
+    cov 를 주면 모수적/몬테카를로 방식에 표본 공분산 대신 사용한다.
+
+    반환: Portfolio, Method, Confidence, Horizon, VaR, CVaR 열의 long 포맷.
+    """
+    asset_returns = returns[weights.columns].dropna()
+    values = asset_returns.to_numpy(dtype=float)
+    w = weights.to_numpy(dtype=float)
+    levels = np.asarray(levels, dtype=float)
+    mu = values.mean(axis=0)
+    if cov is None:
+        cov = np.cov(values, rowvar=False).reshape(len(mu), len(mu))
+    else:
+        cov = cov.loc[weights.columns, weights.columns].to_numpy(dtype=float)
+    port_daily = values @ w.T  # (T, k)
+
+    frames = []
+    for horizon in horizons:
+        results = {}
+        if 'Historical' in methods:
+            results['Historical'] = empirical_var_cvar(horizon_returns(port_daily, horizon), levels)
+        if 'Parametric' in methods:
+            results['Parametric'] = parametric_var_cvar(mu, cov, w, levels, horizon)
+        if 'Monte Carlo' in methods:
+            results['Monte Carlo'] = monte_carlo_var_cvar(mu, cov, w, levels, horizon, n_sims)
+
+        for method, (var, cvar) in results.items():
+            frames.append(pd.DataFrame({
+                'Portfolio': np.tile(weights.index, len(levels)),
+                'Method': method,
+                'Confidence': np.repeat(levels, len(weights)),
+                'Horizon': horizon,
+                'VaR': var.ravel(),
+                'CVaR': cvar.ravel(),
+            }))
+    return pd.concat(frames, ignore_index=True)
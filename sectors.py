@@ -0,0 +1,114 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from disk_cache import disk_cached
+
+
+SECTOR_TTL = 30 * 24 * 3600  # 섹터/산업 분류는 거의 바뀌지 않음
+HOLDINGS_TTL = 7 * 24 * 3600  # ETF 구성은 주 단위로 갱신
+
+# funds_data.sector_weightings 키 -> info['sector'] 표기
+FUND_SECTOR_NAMES = {
+    'realestate': 'Real Estate',
+    'consumer_cyclical': 'Consumer Cyclical',
+    'basic_materials': 'Basic Materials',
+    'consumer_defensive': 'Consumer Defensive',
+    'technology': 'Technology',
+    'communication_services': 'Communication Services',
+    'financial_services': 'Financial Services',
+    'utilities': 'Utilities',
+    'industrials': 'Industrials',
+    'energy': 'Energy',
+    'healthcare': 'Healthcare',
+}
+
+
+@disk_cached('sector', SECTOR_TTL)
+def get_sector_info(ticker_symbol: str) -> dict | None:
+    import yfinance as yf
+
+    try:
+        info = yf.Ticker(ticker_symbol).info
+    except Exception:
+        return None
+    if not info:
+        return None
+    return {
+        'quoteType': info.get('quoteType'),
+        'sector': info.get('sector', 'Unknown'),
+        'industry': info.get('industry', 'Unknown'),
+    }
+
+
+@disk_cached('fund_holdings', HOLDINGS_TTL)
+def get_fund_holdings(ticker_symbol: str) -> dict | None:
+    import yfinance as yf
+
+    try:
+        funds = yf.Ticker(ticker_symbol).funds_data
+        top_holdings = funds.top_holdings
+        sector_weightings = funds.sector_weightings
+    except Exception:
+        return None
+
+    holdings = {}
+    if top_holdings is not None and not top_holdings.empty:
+        holdings = top_holdings['Holding Percent'].astype(float).to_dict()
+    weightings = {FUND_SECTOR_NAMES.get(key, key): float(value) for key, value in (sector_weightings or {}).items()}
+    return {'holdings': holdings, 'sector_weightings': weightings}
+
+
+def _etf_exposure(ticker_symbol: str) -> dict:
+    fund = get_fund_holdings(ticker_symbol)
+    if not fund or not (fund['holdings'] or fund['sector_weightings']):
+        return {'ETF': 1.0}
+
+    # 상위 보유 종목은 종목별 섹터로, 나머지 비중은 펀드 섹터 비중으로 배분
+    exposure = {}
+    holdings = fund['holdings']
+    covered = min(sum(holdings.values()), 1.0)
+    for holding, weight in holdings.items():
+        sector = (get_sector_info(holding) or {}).get('sector', 'Unknown')
+        exposure[sector] = exposure.get(sector, 0.0) + weight
+
+    residual = 1.0 - covered
+    weightings = fund['sector_weightings']
+    total = sum(weightings.values())
+    if residual > 0 and total > 0:
+        for sector, weight in weightings.items():
+            exposure[sector] = exposure.get(sector, 0.0) + residual * weight / total
+    elif residual > 0:
+        exposure['ETF'] = exposure.get('ETF', 0.0) + residual
+
+    scale = sum(exposure.values())
+    return {sector: weight / scale for sector, weight in exposure.items()}
+
+
+def _ticker_exposure(ticker_symbol: str) -> dict:
+    info = get_sector_info(ticker_symbol)
+    if info is None:
+        return {'Unknown': 1.0}
+    if info['quoteType'] == 'ETF':
+        return _etf_exposure(ticker_symbol)
+    return {info['sector']: 1.0}
+
+
+def sector_exposure(tickers: list[str], values: list[float]) -> pd.DataFrame:
+    """티커별 평가금액을 섹터 노출(Ticker, Sector, Value)로 분해한다."""
+    symbols = list(dict.fromkeys(tickers))
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(symbols)))) as pool:
+        exposures = dict(zip(symbols, pool.map(_ticker_exposure, symbols)))
+
+    weights = pd.DataFrame(
+        [(ticker, sector, weight) for ticker, exposure in exposures.items() for sector, weight in exposure.items()],
+        columns=['Ticker', 'Sector', 'Weight'],
+    )
+    positions = pd.DataFrame({'Ticker': tickers, 'Value': values}).groupby('Ticker', as_index=False)['Value'].sum()
+    merged = weights.merge(positions, on='Ticker')
+    merged['Value'] = merged['Weight'] * merged['Value']
+    return merged[['Ticker', 'Sector', 'Value']]
+
+
+def sector_totals(exposure: pd.DataFrame) -> pd.Series:
+    return exposure.groupby('Sector')['Value'].sum().sort_values(ascending=False)
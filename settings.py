@@ -0,0 +1,78 @@
+import datetime
+
+import pandas as pd
+import streamlit as st
+
+from market_data import QUOTE_TTL, RESOLUTIONS, periods_per_year, with_live_prices
+
+
+RESOLUTION_LABELS = {'D': '일간', 'W': '주간', 'M': '월간'}
+RESOLUTION_UNITS = {'D': '일', 'W': '주', 'M': '월'}
+
+# 기간 프리셋 -> 최근 n 년 (None 은 전체)
+WINDOW_PRESETS = {'전체': None, '10년': 10, '5년': 5, '3년': 3, '1년': 1, '직접 지정': 'custom'}
+
+
+def resolution_setting() -> str:
+    """사이드바의 데이터 주기. 페이지를 옮겨도 유지되도록 세션에 보관한다."""
+    options = list(RESOLUTIONS)
+    current = st.session_state.get('resolution', 'D')
+    resolution = st.sidebar.radio("데이터 주기", options, index=options.index(current),
+                                  format_func=RESOLUTION_LABELS.get, horizontal=True,
+                                  help="주간/월간은 패널을 한 번 리샘플링한 뒤 모든 분석에 사용합니다.")
+    st.session_state.resolution = resolution
+    return resolution
+
+
+def date_window_setting() -> tuple[str | None, str | None]:
+    """사이드바의 분석 기간 (YYYY-MM-DD, None 은 제한 없음). 데이터 요청과 캐시 키에 그대로 쓰인다."""
+    presets = list(WINDOW_PRESETS)
+    preset = st.sidebar.selectbox("분석 기간", presets, index=presets.index(st.session_state.get('window_preset', '전체')))
+    st.session_state.window_preset = preset
+
+    today = datetime.date.today()
+    if preset == '직접 지정':
+        start, end = st.session_state.get('custom_window', (today.replace(year=today.year - 5, day=1), today))
+        picked = st.sidebar.date_input("시작일 ~ 종료일", value=(start, end), max_value=today)
+        # 범위를 고르는 도중(날짜 하나)에는 이전 기간 유지
+        if len(picked) == 2:
+            start, end = picked
+            st.session_state.custom_window = (start, end)
+        return start.isoformat(), end.isoformat()
+
+    years = WINDOW_PRESETS[preset]
+    if years is None:
+        return None, None
+    return (pd.Timestamp(today) - pd.DateOffset(years=years)).strftime('%Y-%m-%d'), None
+
+
+def auto_price_setting(paused: bool = False) -> bool:
+    """사이드바의 현재가 자동 갱신. 켜져 있으면 수동 유지 종목을 뺀 현재가를 일괄 시세로 바꾼다.
+
+    paused 면 이번 실행에서는 현재가를 바꾸지 않는다 (편집 중인 표의 데이터가 바뀌면 편집 내용이 초기화됨).
+    """
+    auto = st.sidebar.toggle("현재가 자동 갱신", value=st.session_state.get('auto_price', False),
+                             help=f"보유 종목 전체를 한 번에 조회하고 {QUOTE_TTL}초 동안 재사용합니다.")
+    st.session_state.auto_price = auto
+    stock_list = st.session_state.get('stock_list')
+    if not auto or not stock_list:
+        return auto
+
+    labels = list(dict.fromkeys(stock['stock_name'] for stock in stock_list))
+    manual = st.sidebar.multiselect("수동 현재가 유지", labels,
+                                    default=[ticker for ticker in st.session_state.get('manual_prices', [])
+                                             if ticker in labels])
+    st.session_state.manual_prices = manual
+    if paused:
+        st.sidebar.caption("편집 중에는 현재가 자동 갱신을 잠시 멈춥니다.")
+        return auto
+    try:
+        st.session_state.stock_list = with_live_prices(stock_list, manual)
+    except Exception as e:
+        st.sidebar.warning(f"시세를 가져오지 못했습니다: {e}")
+    return auto
+
+
+def window_periods(trading_days: int, resolution: str) -> int:
+    # 영업일 기준 창 길이를 현재 주기의 봉 수로 환산
+    return max(2, round(trading_days * periods_per_year(resolution) / periods_per_year('D')))
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+
+
+# 이름 -> (시작일, 종료일): 직전 고점부터 저점까지
+SCENARIOS = {
+    '2008 글로벌 금융위기': ('2007-10-09', '2009-03-09'),
+    '2011 미국 신용등급 강등': ('2011-07-22', '2011-10-03'),
+    '2018 미중 무역분쟁 (코스피)': ('2018-01-29', '2018-10-29'),
+    '2020 코로나 폭락': ('2020-02-19', '2020-03-23'),
+    '2022 금리 충격': ('2022-01-03', '2022-10-12'),
+    '2024 엔 캐리 청산 (코스피 블랙먼데이)': ('2024-07-11', '2024-08-05'),
+    '2024 비상계엄 사태': ('2024-12-03', '2024-12-09'),
+}
+START_TOLERANCE = pd.Timedelta(days=7)  # 패널 시작이 시나리오 시작보다 이만큼 늦으면 제외
+STRESS_COLUMNS = ['Scenario', 'Portfolio', 'Start', 'End', 'Return', 'Max Drawdown', 'Trough', 'Recovery Days']
+
+
+def scenario_windows(index: pd.DatetimeIndex, scenarios: dict) -> tuple[list, np.ndarray, np.ndarray]:
+    """패널 인덱스 위의 시나리오 구간 (이름, 시작 위치, 종료 위치). 데이터가 덮지 못하는 구간은 뺀다."""
+    names, starts, ends = [], [], []
+    for name, (start, end) in scenarios.items():
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        i, j = index.searchsorted(start, 'left'), index.searchsorted(end, 'right') - 1
+        if start > end or index[0] - start > START_TOLERANCE or i >= j:
+            continue
+        names.append(name)
+        starts.append(i)
+        ends.append(j)
+    return names, np.array(starts, dtype=int), np.array(ends, dtype=int)
+
+
+def stress_test(panel: pd.DataFrame, weights: pd.DataFrame, scenarios: dict = SCENARIOS) -> pd.DataFrame:
+    """시나리오 시작일에 weights(포트폴리오 × 종목)대로 매수해 보유했을 때의 구간 수익률, 최대 낙폭, 회복 기간.
+
+    panel 은 기준 통화 배당 재투자 지수(행 = 날짜). 모든 시나리오 × 포트폴리오를 (시나리오, 경과, 포트폴리오)
+    배열 하나로 계산한다. 회복은 저점 이후 직전 고점을 되찾을 때까지의 달력일 (패널 끝까지 못 찾으면 NaN).
+    시작/종료일에 시세가 없는 종목을 담은 포트폴리오는 해당 시나리오에서 NaN.
+    """
+    tickers = list(weights.columns)
+    values = panel[tickers].ffill().to_numpy(dtype=float)  # 휴장일 차이는 직전 값으로
+    names, starts, ends = scenario_windows(panel.index, scenarios)
+    if not names:
+        return pd.DataFrame(columns=STRESS_COLUMNS)
+
+    n_rows = len(values)
+    offsets = np.arange(n_rows - starts.min())
+    positions = starts[:, None] + offsets[None, :]  # 시나리오 × 경과
+    inside = positions < n_rows
+    positions = np.minimum(positions, n_rows - 1)
+
+    # 시작일 대비 성장률 (시나리오 × 경과 × 종목) -> 포트폴리오 가치 (시나리오 × 경과 × 포트폴리오)
+    w = weights.to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = values[positions] / values[starts][:, None, :]
+    value = np.where(inside[:, :, None], np.nan_to_num(growth) @ w.T, np.nan)
+    quoted = np.isfinite(values[starts]) & np.isfinite(values[ends])
+    covered = (quoted[:, None, :] | (w == 0)[None, :, :]).all(axis=2) & (np.abs(w).sum(axis=1) > 0)[None, :]
+
+    # 구간 안에서의 고점 대비 낙폭과 저점
+    window = offsets[None, :] <= (ends - starts)[:, None]
+    in_window = np.where(window[:, :, None], value, np.nan)
+    peak = np.fmax.accumulate(in_window, axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        drawdown = in_window / peak - 1
+    # 시세가 없는 (시나리오, 포트폴리오)는 낙폭이 전부 NaN 이라 0 으로 채워 축소 연산을 돌리고, 결과는 아래에서 NaN
+    drawdown = np.where(covered[:, None, :], drawdown, 0.0)
+    max_drawdown = np.nanmin(drawdown, axis=1)
+    trough = np.nanargmin(drawdown, axis=1)
+    period_return = value[np.arange(len(names)), ends - starts] - 1
+
+    # 저점 이후 (구간 밖 포함) 저점 직전 고점을 처음 넘는 시점
+    trough_peak = np.take_along_axis(peak, trough[:, None, :], axis=1)[:, 0, :]
+    recovered = (offsets[None, :, None] > trough[:, None, :]) & (value >= trough_peak[:, None, :])
+    recovery_pos = recovered.argmax(axis=1)
+    dates = panel.index.to_numpy()
+    trough_dates = dates[starts[:, None] + trough]
+    recovery_days = (dates[np.minimum(starts[:, None] + recovery_pos, n_rows - 1)] - trough_dates) / np.timedelta64(1, 'D')
+    recovery_days = np.where(max_drawdown < 0, np.where(recovered.any(axis=1), recovery_days, np.nan), 0.0)
+
+    n_portfolios = len(weights.index)
+    result = pd.DataFrame({
+        'Scenario': np.repeat(names, n_portfolios),
+        'Portfolio': np.tile(list(weights.index), len(names)),
+        'Start': np.repeat(dates[starts], n_portfolios),
+        'End': np.repeat(dates[ends], n_portfolios),
+        'Return': period_return.ravel(),
+        'Max Drawdown': max_drawdown.ravel(),
+        'Trough': trough_dates.ravel(),
+        'Recovery Days': recovery_days.ravel(),
+    })
+    uncovered = ~covered.ravel()
+    result.loc[uncovered, ['Return', 'Max Drawdown', 'Recovery Days']] = np.nan
+    result.loc[uncovered, 'Trough'] = pd.NaT
+    return result
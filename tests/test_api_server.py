@@ -0,0 +1,122 @@
+import json
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from tornado.testing import AsyncHTTPTestCase
+
+import api_server
+import market_data
+
+
+def fake_price_history(ticker_symbol, start=None, end=None, fields=None):
+    # 티커마다 고정된 난수 경로 (환율은 1300 근처), NODATA 는 시세 없음
+    if ticker_symbol == 'NODATA':
+        return pd.DataFrame()
+    index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=750, name='Date')
+    rng = np.random.default_rng(sum(map(ord, ticker_symbol)))
+    level = 1300.0 if ticker_symbol.endswith('=X') else 100.0
+    close = level * np.exp(np.cumsum(rng.normal(0.0003, 0.01, len(index))))
+    history = pd.DataFrame({'Close': close, 'Dividends': 0.0}, index=index)
+    history['TotalReturn'] = close / close[0]
+    history = history.loc[start:end]
+    return history if fields is None else history.reindex(columns=list(fields))
+
+
+def fake_ticker_info(ticker_symbol):
+    return {'quoteType': 'EQUITY', 'shortName': ticker_symbol}
+
+
+KRW_POSITIONS = [
+    {'stock_name': '005930.KS', 'stock_num': 10, 'stock_current': 70000, 'currency_unit': '원(₩)'},
+    {'stock_name': '000660.KS', 'stock_num': 2, 'stock_current': 180000, 'currency_unit': '원(₩)'},
+]
+MIXED_POSITIONS = KRW_POSITIONS + [{'stock_name': 'AAPL', 'stock_num': 5, 'stock_current': 200,
+                                    'currency_unit': 'USD($)'}]
+
+
+class ApiServerTest(AsyncHTTPTestCase):
+    def setUp(self):
+        self.patches = [(market_data, 'get_price_history', fake_price_history),
+                        (market_data, 'get_ticker_info', fake_ticker_info)]
+        self.originals = [getattr(module, name) for module, name, _ in self.patches]
+        for module, name, value in self.patches:
+            setattr(module, name, value)
+        st.cache_data.clear()
+        super().setUp()
+
+    def tearDown(self):
+        super().tearDown()
+        for (module, name, _), original in zip(self.patches, self.originals):
+            setattr(module, name, original)
+        st.cache_data.clear()
+
+    def get_app(self):
+        return api_server.make_app(threads=2)
+
+    def post(self, path, body):
+        response = self.fetch(path, method='POST', body=json.dumps(body))
+        return response, json.loads(response.body)
+
+    def test_health(self):
+        response = self.fetch('/api/health')
+        self.assertEqual(response.code, 200)
+        self.assertEqual(json.loads(response.body), {'status': 'ok'})
+
+    def test_panel_and_correlation(self):
+        response = self.fetch('/api/panel?tickers=AAPL,005930.KS&start=2025-01-01')
+        self.assertEqual(response.code, 200)
+        self.assertEqual(json.loads(response.body)['columns'], ['AAPL', '005930.KS'])
+
+        response = self.fetch('/api/correlation?tickers=AAPL,005930.KS&kind=log_return&resolution=W')
+        self.assertEqual(response.code, 200)
+        corr = np.array(json.loads(response.body)['data'])
+        self.assertTrue(np.allclose(np.diag(corr), 1.0))
+
+    def test_arrow_response(self):
+        import pyarrow as pa
+
+        response = self.fetch('/api/correlation?tickers=AAPL,005930.KS&format=arrow')
+        self.assertEqual(response.code, 200)
+        self.assertEqual(response.headers['Content-Type'], api_server.ARROW_MIME)
+        self.assertEqual(pa.ipc.open_stream(response.body).read_all().num_rows, 2)
+
+    def test_all_krw_portfolio(self):
+        # 원화 종목만 담은 포트폴리오 (환율 조회 없이 계산)
+        response, body = self.post('/api/summary', {'positions': KRW_POSITIONS})
+        self.assertEqual(response.code, 200)
+        summary = pd.DataFrame(body['data'], columns=body['columns'])
+        self.assertEqual(list(summary['Value']), [700000, 360000])
+
+        for path in ('/api/performance', '/api/optimization'):
+            response, body = self.post(path, {'positions': KRW_POSITIONS, 'sims': 50})
+            self.assertEqual(response.code, 200, body)
+
+    def test_mixed_currency_portfolio(self):
+        response, body = self.post('/api/optimization', {'positions': MIXED_POSITIONS, 'sims': 50,
+                                                         'cov_method': 'Ledoit-Wolf', 'resolution': 'W'})
+        self.assertEqual(response.code, 200, body)
+        self.assertEqual(len(body['data']), 3)
+
+    def test_validation_errors(self):
+        self.assertEqual(self.fetch('/api/panel?tickers=').code, 400)
+        self.assertEqual(self.fetch('/api/correlation?tickers=AAPL&resolution=Y').code, 400)
+        self.assertEqual(self.fetch('/api/panel?tickers=AAPL&start=2024-02-01&end=2024-01-01').code, 400)
+        response, body = self.post('/api/summary', {'positions': []})
+        self.assertEqual(response.code, 400)
+        self.assertIn('error', body)
+
+    def test_data_errors(self):
+        # 시세가 없는 티커, 공통 시세가 없는 기간은 500 대신 메시지와 함께 400
+        response, body = self.post('/api/performance', {'positions': KRW_POSITIONS + [
+            {'stock_name': 'NODATA', 'stock_num': 1, 'stock_current': 10, 'currency_unit': 'USD($)'}]})
+        self.assertEqual(response.code, 400)
+        self.assertIn('NODATA', body['error'])
+
+        response, body = self.post('/api/optimization', {'positions': KRW_POSITIONS, 'start': '2025-06-02',
+                                                         'end': '2025-06-02'})
+        self.assertEqual(response.code, 400)
+        self.assertIn('2일 미만', body['error'])
+
+        response = self.fetch('/api/correlation?tickers=NODATA')
+        self.assertEqual(response.code, 400)
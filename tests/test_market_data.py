@@ -0,0 +1,30 @@
+import pandas as pd
+import pytest
+import streamlit as st
+
+import market_data
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    st.cache_data.clear()
+    yield
+    st.cache_data.clear()
+
+
+def no_fetch(*args, **kwargs):
+    raise AssertionError("기준 통화만 있으면 환율을 조회하지 않아야 합니다.")
+
+
+def test_latest_fx_rates_base_only(monkeypatch):
+    # 원화 종목만 담은 포트폴리오 (환율 행렬이 빈 표가 되던 경우)
+    monkeypatch.setattr(market_data, 'get_price_history', no_fetch)
+    assert market_data.latest_fx_rates(('KRW', 'KRW')) == {'KRW': 1.0}
+    assert market_data.latest_fx_rates(()) == {'KRW': 1.0}
+
+
+def test_latest_fx_rates_mixed(monkeypatch):
+    index = pd.date_range(end=pd.Timestamp.today().normalize(), periods=5, freq='B')
+    close = pd.DataFrame({'Close': [1300.0, 1310.0, None, 1320.0, None]}, index=index)
+    monkeypatch.setattr(market_data, 'get_price_history', lambda *args, **kwargs: close)
+    assert market_data.latest_fx_rates(('KRW', 'USD')) == {'USD': 1320.0, 'KRW': 1.0}
@@ -0,0 +1,14 @@
+import numpy as np
+import pandas as pd
+
+from risk import var_table
+
+
+def test_horizon_longer_than_sample_is_nan():
+    # 월간 1년 창(수익률 11개)에서 21기간 VaR
+    returns = pd.DataFrame(np.random.default_rng(0).normal(0, 0.05, (11, 2)), columns=['A', 'B'])
+    weights = pd.DataFrame([[0.5, 0.5]], index=['Equal'], columns=['A', 'B'])
+    table = var_table(returns, weights, horizons=(21,), methods=('Historical', 'Parametric'))
+    historical = table[table['Method'] == 'Historical']
+    assert historical[['VaR', 'CVaR']].isna().all().all()
+    assert table[table['Method'] == 'Parametric'][['VaR', 'CVaR']].notna().all().all()
@@ -0,0 +1,93 @@
+"""페이지별 cold start / warm rerun 시간 측정.
+
+    python timing_report.py                  # 홈 페이지
+    python timing_report.py --all            # 분석 페이지 포함 (시세 조회 필요)
+    python timing_report.py "pages/3포트폴리오 분석.py" --reruns 5
+
+cold 는 새 프로세스에서 첫 실행(임포트 포함), warm 은 같은 세션의 재실행 중앙값이다.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+HOME_PAGE = "pages/0홈.py"
+ANALYSIS_PAGES = ["pages/1비중.py", "pages/2개별 분석.py", "pages/3포트폴리오 분석.py",
+                  "pages/4포트폴리오 평가.py", "pages/5포트폴리오 상관관계 분석.py"]
+SAMPLE_PORTFOLIO = [
+    {'stock_name': 'AAPL', 'stock_num': 10.0, 'stock_current': 200.0, 'stock_price': 150.0,
+     'currency_unit': 'USD($)'},
+    {'stock_name': '005930.KS', 'stock_num': 20.0, 'stock_current': 70000.0, 'stock_price': 60000.0,
+     'currency_unit': '원(₩)'},
+]
+HEAVY_MODULES = ('yfinance', 'plotly', 'pyarrow', 'scipy', 'peewee', 'requests')
+
+
+def measure_page(page: str, reruns: int) -> dict:
+    # 자식 프로세스에서 실행: 임포트 비용까지 cold 에 포함
+    started = time.perf_counter()
+    from streamlit.testing.v1 import AppTest
+    import streamlit.delta_generator as delta_generator
+    delta_generator.DeltaGenerator.page_link = lambda self, *args, **kwargs: None  # 테스트 러너는 페이지 링크 미지원
+    framework_s = time.perf_counter() - started
+    preloaded = set(sys.modules)
+
+    app = AppTest.from_file(os.path.join(ROOT, page), default_timeout=600)
+    if page != HOME_PAGE:
+        app.session_state.stock_list = SAMPLE_PORTFOLIO
+    started = time.perf_counter()
+    app.run()
+    cold_s = time.perf_counter() - started
+
+    warm = []
+    for _ in range(reruns):
+        started = time.perf_counter()
+        app.run()
+        warm.append(time.perf_counter() - started)
+
+    return {
+        'page': page,
+        'framework_s': framework_s,
+        'cold_s': cold_s,
+        'warm_s': statistics.median(warm) if warm else None,
+        'errors': [str(exception.value) for exception in app.exception],
+        # 프레임워크가 이미 불러온 것을 제외하고 페이지가 새로 임포트한 무거운 패키지
+        'heavy_modules': [name for name in HEAVY_MODULES if name in sys.modules and name not in preloaded],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pages', nargs='*')
+    parser.add_argument('--all', action='store_true', help='분석 페이지까지 측정')
+    parser.add_argument('--reruns', type=int, default=3)
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_page(args.child, args.reruns), ensure_ascii=False))
+        return
+
+    pages = args.pages or ([HOME_PAGE] + (ANALYSIS_PAGES if args.all else []))
+    print(f"{'page':<32}{'import st':>10}{'cold':>9}{'warm':>9}  loaded")
+    for page in pages:
+        output = subprocess.run([sys.executable, __file__, '--child', page, '--reruns', str(args.reruns)],
+                                cwd=ROOT, capture_output=True, text=True)
+        lines = output.stdout.strip().splitlines()
+        if output.returncode != 0 or not lines:
+            print(f"{page:<32} 실패: {output.stderr.strip().splitlines()[-1:]}")
+            continue
+        result = json.loads(lines[-1])
+        warm = f"{result['warm_s']:.3f}" if result['warm_s'] is not None else '-'
+        print(f"{page:<32}{result['framework_s']:>10.3f}{result['cold_s']:>9.3f}{warm:>9}  "
+              f"{', '.join(result['heavy_modules']) or '-'}")
+        for error in result['errors']:
+            print(f"    ! {error}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,6 @@
-﻿import streamlit as st
-import plotly.io as pio
-import plotly.graph_objects as go
+﻿import re
+
+import streamlit as st
 
 
 THEME_CSS = """
@@ -173,7 +173,19 @@ div[data-baseweb="select"] > div,
 """
 
 
+# 스타일은 매 실행 다시 보내야 하므로 공백만 한 번 줄여 둔다
+_THEME_CSS_MIN = re.sub(r"\s*\n\s*", " ", THEME_CSS).strip()
+_template_registered = False
+
+
 def _apply_plotly_template() -> None:
+    # 템플릿은 프로세스 전역이므로 한 번만 등록 (plotly 도 차트를 그리는 페이지에서만 임포트)
+    global _template_registered
+    if _template_registered:
+        return
+    import plotly.graph_objects as go
+    import plotly.io as pio
+
     base = pio.templates["plotly_dark"]
     layout_update = go.Layout(
         paper_bgcolor="rgba(0,0,0,0)",
@@ -195,6 +207,7 @@ def _apply_plotly_template() -> None:
         layout=base.layout.update(layout_update)
     )
     pio.templates.default = "portfolio_dark"
+    _template_registered = True
 
 
 def _render_sidebar_nav() -> None:
@@ -206,17 +219,27 @@ def _render_sidebar_nav() -> None:
     st.sidebar.page_link("pages/3포트폴리오 분석.py", label="포트폴리오 · 성과 분석", icon="📈")
     st.sidebar.page_link("pages/4포트폴리오 평가.py", label="포트폴리오 · 샤프 평가", icon="🧠")
     st.sidebar.page_link("pages/5포트폴리오 상관관계 분석.py", label="리스크 · 상관관계", icon="🔗")
+    st.sidebar.page_link("pages/7장중 모니터링.py", label="장중 · 실시간 손익", icon="⏱️")
     st.sidebar.page_link("pages/6피드백.py", label="피드백", icon="✍️")
 
 
+# 이동 버튼만 다시 실행되므로 클릭 시 페이지 전체를 다시 계산하지 않음
+@st.fragment
+def next_page_button(page: str, label: str = "다음") -> None:
+    if st.button(label):
+        st.switch_page(page)
+
+
 def apply_theme(
     page_title: str,
     hide_streamlit_chrome: bool = False,
     render_sidebar_nav: bool = True,
+    plotly_template: bool = True,
 ) -> None:
     st.set_page_config(page_title=page_title, layout="wide", initial_sidebar_state="expanded")
-    _apply_plotly_template()
-    st.markdown(THEME_CSS, unsafe_allow_html=True)
+    if plotly_template:
+        _apply_plotly_template()
+    st.markdown(_THEME_CSS_MIN, unsafe_allow_html=True)
     if render_sidebar_nav:
         _render_sidebar_nav()
 